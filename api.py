@@ -0,0 +1,131 @@
+from typing import Dict, Optional, Tuple
+from repository import Repository
+
+# Request handling shared by the Flask routes and the ASGI app. Each handler
+# returns the JSON body and the HTTP status code.
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PLANETS_PER_REQUEST = 1000
+PLANET_CACHE_MAX_AGE = 60  # seconds clients and proxies may reuse planet data
+MOVE_FUEL_COST = 10
+MAX_BATCH_MOVES = 1000
+
+PLAYER_OR_PLANET_NOT_FOUND = {
+    "error": "Spieler oder Planet nicht gefunden",
+    "message": "Bewegung nicht möglich"
+}
+NOT_ENOUGH_FUEL = {
+    "error": "Nicht genug Treibstoff",
+    "message": f"Mindestens {MOVE_FUEL_COST} Treibstoffeinheiten benötigt"
+}
+
+def get_planet(repository: Repository, planet_id: Optional[str]) -> Tuple[Dict, int]:
+    planet = repository.get_planet(planet_id)
+    if planet:
+        return planet, 200
+    return {"error": "Planet not found"}, 404
+
+def get_planets(repository: Repository, ids: Optional[str], page: int, per_page: int) -> Tuple[Dict, int]:
+    """Return the planets listed in ids ("a,b,c"), or one page of all planets."""
+    if ids is not None:
+        planet_ids = [planet_id for planet_id in ids.split(',') if planet_id]
+        if len(planet_ids) > MAX_PLANETS_PER_REQUEST:
+            return {"error": f"At most {MAX_PLANETS_PER_REQUEST} ids per request"}, 400
+        planets = repository.get_planets(planet_ids)
+        found = {planet['planetId'] for planet in planets}
+        return {
+            "planets": planets,
+            "missing": [planet_id for planet_id in planet_ids if planet_id not in found]
+        }, 200
+
+    if page < 1 or not 1 <= per_page <= MAX_PLANETS_PER_REQUEST:
+        return {"error": f"page must be >= 1 and per_page between 1 and {MAX_PLANETS_PER_REQUEST}"}, 400
+    planets, total = repository.planet_page((page - 1) * per_page, per_page)
+    return {
+        "planets": planets,
+        "page": page,
+        "per_page": per_page,
+        "total": total
+    }, 200
+
+def move_response(player: Dict, planet: Dict) -> Dict:
+    return {
+        "player": player,
+        "planet": planet,
+        "message": f"Du bist zu einem neuen Planeten gereist:\n\t→ {planet['name']}. Treibstoffverbrauch: {MOVE_FUEL_COST} Einheiten."
+    }
+
+def well_formed_move(data) -> bool:
+    """Return True if data is a JSON object with string 'player_id' and 'destination_planet_id'."""
+    # IDs of other types can't be looked up in the repositories
+    return (isinstance(data, dict) and isinstance(data.get('player_id'), str)
+            and isinstance(data.get('destination_planet_id'), str))
+
+def move(repository: Repository, data: Optional[Dict]) -> Tuple[Dict, int]:
+    if not data:
+        return {"error": "No JSON data provided"}, 400
+    if not well_formed_move(data):
+        return {"error": "Expected a JSON object with string 'player_id' and 'destination_planet_id'"}, 400
+
+    player_id = data.get('player_id')
+    destination_planet_id = data.get('destination_planet_id')
+    
+    # Find player and planet
+    player = repository.get_player(player_id)
+    destination_planet = repository.get_planet(destination_planet_id)
+    
+    if not player or not destination_planet:
+        return PLAYER_OR_PLANET_NOT_FOUND, 404
+    
+    # Update player's fuel and current planet, unless they have too little fuel
+    player = repository.move_player(player_id, destination_planet_id, MOVE_FUEL_COST)
+    if not player:
+        return NOT_ENOUGH_FUEL, 400
+    
+    return move_response(player, destination_planet), 200
+
+def move_batch(repository: Repository, data: Optional[Dict]) -> Tuple[Dict, int]:
+    """
+    Apply many moves in one request.
+
+    Expects {"moves": [{"player_id": ..., "destination_planet_id": ...}, ...]}
+    and returns one result per move, each with its own status code.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('moves'), list):
+        return {"error": "Expected a JSON object with a 'moves' list"}, 400
+    moves = data['moves']
+    if len(moves) > MAX_BATCH_MOVES:
+        return {"error": f"At most {MAX_BATCH_MOVES} moves per batch"}, 400
+
+    results = [None] * len(moves)
+    valid = []  # (index, player_id, planet)
+    # A malformed move only fails itself
+    well_formed = [well_formed_move(move) for move in moves]
+    planets = {planet['planetId']: planet for planet in repository.get_planets(
+        [move['destination_planet_id'] for move, ok in zip(moves, well_formed) if ok]
+    )}
+    for index, move in enumerate(moves):
+        if not well_formed[index]:
+            results[index] = {
+                "status": 400,
+                "error": "Each move must be a JSON object with string 'player_id' and 'destination_planet_id'"
+            }
+            continue
+        player_id = move.get('player_id')
+        planet = planets.get(move.get('destination_planet_id'))
+        if not planet or not repository.get_player(player_id):
+            results[index] = {"status": 404, **PLAYER_OR_PLANET_NOT_FOUND}
+            continue
+        valid.append((index, player_id, planet))
+
+    # All valid moves are applied and persisted together
+    players = repository.move_players(
+        [(player_id, planet['planetId']) for _, player_id, planet in valid], MOVE_FUEL_COST
+    )
+    for (index, _, planet), player in zip(valid, players):
+        if player:
+            results[index] = {"status": 200, **move_response(player, planet)}
+        else:
+            results[index] = {"status": 400, **NOT_ENOUGH_FUEL}
+
+    return {"results": results}, 200
@@ -0,0 +1,183 @@
+# FILE: asgi.py
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+from werkzeug.http import generate_etag, http_date, parse_date, parse_etags, quote_etag
+import api
+from storage import close_repositories, get_repository
+
+MAX_BODY_SIZE = 1024 * 1024  # bytes accepted in a request body
+
+def _int_arg(args: Dict[str, List[str]], name: str, default: int) -> int:
+    """Parse an integer query argument like Flask's request.args.get(type=int)."""
+    try:
+        return int(args[name][0])
+    except (KeyError, ValueError):
+        return default
+
+class AsgiApp:
+    """
+    ASGI app serving the same routes and responses as the Flask app.
+
+    Requests are handled on the event loop. Storage calls, which may touch
+    files or the database, run in a thread pool so they never block other
+    connections.
+    """
+    def __init__(self, config: Optional[Dict] = None, storage_workers: int = 32) -> None:
+        config = config or {}
+        self.repository = get_repository(config.get('STORAGE_BACKEND'), config.get('DATA_DIR'))
+        self._executor = ThreadPoolExecutor(storage_workers, thread_name_prefix='storage')
+        self._routes = {
+            '/planet': ('GET', self.get_planet),
+            '/planets': ('GET', self.get_planets),
+            '/move': ('POST', self.move),
+            '/move/batch': ('POST', self.move_batch)
+        }
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        route = self._routes.get(scope['path'])
+        if route is None:
+            await self._send_json(send, {"error": "Not found"}, 404)
+            return
+        method, handler = route
+        if scope['method'] != method:
+            await self._send_json(send, {"error": "Method not allowed"}, 405, [(b'allow', method.encode())])
+            return
+
+        headers = dict(scope['headers'])
+        await handler(scope, headers, receive, send)
+
+    async def _storage(self, func, *args):
+        """Run an api handler against the repository in the storage thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, self.repository, *args)
+
+    async def get_planet(self, scope, headers, receive, send) -> None:
+        args = parse_qs(scope['query_string'].decode('latin-1'))
+        body, status = await self._storage(api.get_planet, args.get('planetId', [None])[0])
+        await self._send_planets(send, headers, body, status)
+
+    async def get_planets(self, scope, headers, receive, send) -> None:
+        args = parse_qs(scope['query_string'].decode('latin-1'))
+        body, status = await self._storage(
+            api.get_planets,
+            args.get('ids', [None])[0],
+            _int_arg(args, 'page', 1),
+            _int_arg(args, 'per_page', api.DEFAULT_PAGE_SIZE)
+        )
+        await self._send_planets(send, headers, body, status)
+
+    async def move(self, scope, headers, receive, send) -> None:
+        data = await self._read_json(receive, send)
+        if data is not False:
+            await self._send_json(send, *await self._storage(api.move, data))
+
+    async def move_batch(self, scope, headers, receive, send) -> None:
+        data = await self._read_json(receive, send)
+        if data is not False:
+            await self._send_json(send, *await self._storage(api.move_batch, data))
+
+    async def _read_json(self, receive, send):
+        """Return the parsed request body, None if it isn't JSON, or False if a response was sent."""
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return False
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > MAX_BODY_SIZE:
+                await self._send_json(send, {"error": "Request body too large"}, 413)
+                return False
+            chunks.append(chunk)
+            if not message.get('more_body', False):
+                break
+        try:
+            return json.loads(b''.join(chunks))
+        except ValueError:
+            return None
+
+    async def _send_planets(self, send, headers: Dict[bytes, bytes], body: Dict, status: int) -> None:
+        """Send planet data with the same caching headers and 304 handling as the Flask app."""
+        if status != 200:
+            await self._send_json(send, body, status)
+            return
+
+        data = self._encode(body)
+        etag = generate_etag(data)
+        extra = [
+            (b'etag', quote_etag(etag).encode()),
+            (b'cache-control', f"public, max-age={api.PLANET_CACHE_MAX_AGE}".encode())
+        ]
+        modified = await self._storage(lambda repository: repository.planets_modified())
+        if modified is not None:
+            extra.append((b'last-modified', http_date(modified).encode()))
+
+        if b'if-none-match' in headers:
+            not_modified = parse_etags(headers[b'if-none-match'].decode('latin-1')).contains_weak(etag)
+        else:
+            since = parse_date(headers.get(b'if-modified-since', b'').decode('latin-1'))
+            not_modified = since is not None and modified is not None and int(modified) <= since.timestamp()
+
+        if not_modified:
+            await send({'type': 'http.response.start', 'status': 304, 'headers': extra})
+            await send({'type': 'http.response.body', 'body': b''})
+        else:
+            await self._send(send, data, 200, extra)
+
+    @staticmethod
+    def _encode(body: Dict) -> bytes:
+        # Same bytes as Flask's jsonify outside debug mode, so ETags match
+        return (json.dumps(body, sort_keys=True, separators=(',', ':')) + '\n').encode('utf-8')
+
+    async def _send_json(self, send, body: Dict, status: int, extra: Optional[List[Tuple[bytes, bytes]]] = None) -> None:
+        await self._send(send, self._encode(body), status, extra or [])
+
+    @staticmethod
+    async def _send(send, data: bytes, status: int, extra: List[Tuple[bytes, bytes]]) -> None:
+        headers = [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(data)).encode())
+        ] + extra
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': data})
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def close(self) -> None:
+        """Wait for pending storage calls and flush the repositories."""
+        self._executor.shutdown(wait=True)
+        close_repositories()
+
+def create_app(config: Optional[Dict] = None) -> AsgiApp:
+    """Create the ASGI app; config takes the same DATA_DIR/STORAGE_BACKEND keys as main.create_app."""
+    return AsgiApp(config)
+
+def main():
+    try:
+        import uvicorn
+    except ImportError:
+        print("The ASGI server needs uvicorn: pip install uvicorn")
+        return
+    print("Welcome to Space Explorer Console Game!")
+    uvicorn.run('asgi:create_app', factory=True, port=5000)
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,124 @@
-class Asteroid:
+import numpy as np
+from spatial_index import NO_COLLISION
+
+class AsteroidField:
     """
-    Represents an asteroid in the space exploration game.
+    All asteroids in the game, stored as parallel NumPy arrays.
+
+    Asteroid i is (x[i], y[i], visible[i], crashed[i]) for i < count. The
+    arrays are advanced in bulk, and destroyed asteroids are dropped by
+    compacting the survivors to the front of the same arrays. Asteroids
+    only fall straight down, so they are kept sorted by x and the ones in
+    a range of columns are a contiguous slice.
     """
-    def __init__(self, x: int, y: int) -> None:
-        self.x = x
-        self.y = y
-        self.visible = True
-        self.crashed = False  # Track if asteroid has crashed into a planet
-        
-    def move_down(self, distance: int, planets) -> None:
-        """Move asteroid down by the specified distance, checking for planet collisions"""
-        if self.crashed:
+    def __init__(self, capacity: int = 64) -> None:
+        self.count = 0
+        self._destroyed = 0  # invisible asteroids not yet compacted away
+        self.x = np.zeros(capacity, dtype=np.int32)
+        self.y = np.zeros(capacity, dtype=np.int32)
+        self.visible = np.zeros(capacity, dtype=bool)
+        self.crashed = np.zeros(capacity, dtype=bool)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, x: int, y: int) -> None:
+        """Add a new asteroid at (x, y)."""
+        if self.count == len(self.x):
+            self._grow(2 * self.count)
+        n = self.count
+        i = int(np.searchsorted(self.x[:n], x, side='right'))
+        for array in (self.x, self.y, self.visible, self.crashed):
+            array[i + 1:n + 1] = array[i:n]
+        self.x[i] = x
+        self.y[i] = y
+        self.visible[i] = True
+        self.crashed[i] = False
+        self.count += 1
+
+    def _grow(self, capacity: int) -> None:
+        for name in ('x', 'y', 'visible', 'crashed'):
+            old = getattr(self, name)
+            new = np.zeros(max(capacity, 1), dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def move_down(self, distance: int, planet_index, bottom: int, player_x: int, player_y: int) -> int:
+        """
+        Move every flying asteroid down by distance rows in one step.
+
+        The whole path is swept, so no asteroid can skip over a planet or
+        the player however far it moves.
+
+        Args:
+            distance: Rows to move
+            planet_index: PlanetIndex or PlanetBitmap to collide with
+            bottom: Asteroids reaching this row leave the simulated area
+            player_x: Player column
+            player_y: Player row
+
+        Returns:
+            The number of asteroids that hit the player on the way
+        """
+        n = self.count
+        moving = np.flatnonzero(self.visible[:n] & ~self.crashed[:n])
+        x = self.x[moving]
+        start = self.y[moving]
+        crash_row = planet_index.sweep_many(x, start, distance)
+        crash = crash_row != NO_COLLISION
+        end = np.where(crash, crash_row, start + distance)
+
+        # The player's cell is never inside a planet, so reaching it means the asteroid got there first
+        hit = (x == player_x) & (start < player_y) & (player_y <= end)
+        y = np.where(hit, player_y, end)
+        self.y[moving] = y
+        self.crashed[moving[crash & ~hit]] = True
+        # Crashed asteroids become invisible immediately
+        gone = moving[crash | hit | (y >= bottom)]
+        self.visible[gone] = False
+        self._destroyed += len(gone)
+        return int(np.count_nonzero(hit))
+
+    def hit_player(self, x: int, y: int) -> int:
+        """Destroy the asteroids at (x, y) and return how many there were."""
+        # Only the asteroids in column x need checking
+        column = self.columns(x, x + 1)
+        hits = self.visible[column] & (self.y[column] == y)
+        count = int(np.count_nonzero(hits))
+        if count:
+            self.visible[column][hits] = False
+            self._destroyed += count
+        return count
+
+    def retain(self, left: int, top: int, right: int, bottom: int) -> None:
+        """Destroy the asteroids outside left <= x < right, top <= y < bottom."""
+        n = self.count
+        x, y = self.x[:n], self.y[:n]
+        outside = self.visible[:n] & ((x < left) | (x >= right) | (y < top) | (y >= bottom))
+        self.visible[:n][outside] = False
+        self._destroyed += int(np.count_nonzero(outside))
+
+    def compact(self) -> None:
+        """Drop invisible asteroids in place, keeping the rest in order."""
+        if not self._destroyed:
             return
-            
-        new_y = self.y + distance
-        self.y = new_y
-        
-        if self.check_planet_collision(planets):
-            self.crashed = True
-            self.visible = False  # Become invisible immediately on crash
-
-    def check_planet_collision(self, planets) -> bool:
-        """Check if asteroid collides with any planet"""
-        if self.crashed:
-            return False
-            
-        for planet in planets:
-            if planet.is_collision(self.x, self.y):
-                return True
-        return False
-    
-    def update(self, current_time: float) -> None:
-        """Update asteroid state"""
-        if self.crashed and current_time - 0 > 0.5:  # Remove crash animation after 0.5 seconds
-            self.visible = False
\ No newline at end of file
+        n = self.count
+        # Copy, since visible itself is compacted below
+        keep = self.visible[:n].copy()
+        kept = n - self._destroyed
+        for array in (self.x, self.y, self.visible, self.crashed):
+            array[:kept] = array[:n][keep]
+        self.count = kept
+        self._destroyed = 0
+
+    def columns(self, left: int, right: int) -> slice:
+        """Return the slice of asteroids with left <= x < right."""
+        start, stop = np.searchsorted(self.x[:self.count], (left, right))
+        return slice(int(start), int(stop))
+
+    def in_rect(self, left: int, top: int, right: int, bottom: int):
+        """Return x and y arrays of the visible asteroids with left <= x < right and top <= y < bottom."""
+        columns = self.columns(left, right)
+        x, y = self.x[columns], self.y[columns]
+        mask = self.visible[columns] & (y >= top) & (y < bottom)
+        return x[mask], y[mask]
@@ -0,0 +1,392 @@
+# FILE: bench_api.py
+"""
+Load test and latency benchmark for the API.
+
+Generates a world of the requested size, starts the Flask or ASGI app
+in-process or on a local port (or targets a running server with --url),
+drives GET /planet and POST /move at the given concurrency and reports
+requests per second and p50/p95/p99 latency per scenario.
+
+Results can be written as JSON with --output, saved as a baseline with
+--save-baseline, and checked against a baseline with --baseline; the
+process exits with status 1 when a scenario regressed by more than
+--max-regression, or when the baseline was run with another configuration.
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+SCENARIOS = ('planet', 'move')
+# Results are only comparable with a baseline that used the same settings
+COMPARED_CONFIG = ('app', 'backend', 'target', 'players', 'planets', 'requests', 'concurrency')
+
+Request = Tuple[str, str, str, bytes]  # method, path, query, body
+
+def make_world(data_dir: str, num_players: int, num_planets: int) -> None:
+    """
+    Write planets.json and players.json with enough fuel that no move fails.
+
+    The files are streamed, so a million players don't have to fit in a
+    list first.
+    """
+    with open(os.path.join(data_dir, 'planets.json'), 'w') as file:
+        file.write('[')
+        for i in range(num_planets):
+            if i:
+                file.write(',')
+            json.dump({"planetId": f"planet{i}", "name": f"Planet {i}"}, file)
+        file.write(']')
+    with open(os.path.join(data_dir, 'players.json'), 'w') as file:
+        file.write('[')
+        for i in range(num_players):
+            if i:
+                file.write(',')
+            json.dump({
+                "playerId": f"player{i}",
+                "name": f"Captain{i}",
+                "inventory": {"fuel": 10 ** 9, "iron": 0, "gold": 0},
+                "currentPlanetId": None
+            }, file)
+        file.write(']')
+
+def make_requests(scenario: str, count: int, num_players: int, num_planets: int) -> List[Request]:
+    """Return random requests for a world created by make_world."""
+    requests = []
+    for _ in range(count):
+        planet_id = f"planet{random.randrange(num_planets)}"
+        if scenario == 'planet':
+            requests.append(('GET', '/planet', f"planetId={planet_id}", b''))
+        else:
+            body = json.dumps({"player_id": f"player{random.randrange(num_players)}", "destination_planet_id": planet_id})
+            requests.append(('POST', '/move', '', body.encode()))
+    return requests
+
+def run_threads(call: Callable[[Request], int], requests: List[Request], concurrency: int) -> Tuple[List[float], int, float]:
+    """Run call for every request on a thread pool; return latencies, error count and elapsed time."""
+    def timed(request):
+        start = time.perf_counter()
+        status = call(request)
+        return time.perf_counter() - start, status
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(timed, requests))
+    elapsed = time.perf_counter() - start
+    return [latency for latency, _ in results], sum(1 for _, status in results if status != 200), elapsed
+
+def run_flask(app, requests: List[Request], concurrency: int) -> Tuple[List[float], int, float]:
+    """Call the Flask app through its test client, the way a threaded WSGI server would."""
+    local = threading.local()
+
+    def call(request):
+        method, path, query, body = request
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        return local.client.open(path, method=method, query_string=query, data=body,
+                                 content_type='application/json').status_code
+
+    return run_threads(call, requests, concurrency)
+
+async def call_asgi(app, request: Request) -> int:
+    """Send one request straight into an ASGI app and return the status code."""
+    method, path, query, body = request
+    scope = {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': query.encode(),
+        'headers': [(b'content-type', b'application/json')]
+    }
+    received = False
+    status = None
+
+    async def receive():
+        nonlocal received
+        if received:
+            return {'type': 'http.disconnect'}
+        received = True
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await app(scope, receive, send)
+    return status
+
+def run_asgi(app, requests: List[Request], concurrency: int) -> Tuple[List[float], int, float]:
+    """Call the ASGI app from concurrency tasks on one event loop."""
+    async def run():
+        pending = iter(requests)
+        latencies = []
+        errors = 0
+
+        async def worker():
+            nonlocal errors
+            for request in pending:
+                start = time.perf_counter()
+                status = await call_asgi(app, request)
+                latencies.append(time.perf_counter() - start)
+                errors += status != 200
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return latencies, errors
+
+    start = time.perf_counter()
+    latencies, errors = asyncio.run(run())
+    return latencies, errors, time.perf_counter() - start
+
+def run_http(url: str, requests: List[Request], concurrency: int) -> Tuple[List[float], int, float]:
+    """Send real HTTP requests, one keep-alive connection per worker thread."""
+    parts = urlsplit(url)
+    local = threading.local()
+
+    def call(request):
+        method, path, query, body = request
+        target = f"{path}?{query}" if query else path
+        for attempt in range(2):
+            if not hasattr(local, 'conn'):
+                local.conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+                local.conn.connect()
+                # Don't let Nagle's algorithm hold back small requests
+                local.conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            try:
+                local.conn.request(method, target, body=body or None, headers={'Content-Type': 'application/json'})
+                response = local.conn.getresponse()
+                response.read()
+                return response.status
+            except (OSError, http.client.HTTPException):
+                # The server closed the keep-alive connection; reconnect once
+                local.conn.close()
+                del local.conn
+                if attempt:
+                    return 0
+
+    return run_threads(call, requests, concurrency)
+
+def _free_socket() -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(('127.0.0.1', 0))
+    return sock
+
+def serve_flask(app) -> Tuple[str, Callable[[], None]]:
+    """Serve the Flask app on a free local port with werkzeug's threaded server."""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def stop():
+        server.shutdown()
+        thread.join()
+
+    return f"http://127.0.0.1:{server.server_port}", stop
+
+def serve_asgi(app) -> Tuple[str, Callable[[], None]]:
+    """Serve the ASGI app on a free local port with uvicorn."""
+    import uvicorn
+
+    sock = _free_socket()
+    server = uvicorn.Server(uvicorn.Config(app, log_level='warning', lifespan='off'))
+    thread = threading.Thread(target=server.run, kwargs={'sockets': [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    def stop():
+        server.should_exit = True
+        thread.join()
+        sock.close()
+
+    return f"http://127.0.0.1:{sock.getsockname()[1]}", stop
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    """Return throughput and latency percentiles (in milliseconds) for one run."""
+    ordered = sorted(latencies)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(50), 3),
+        "p95_ms": round(percentile(95), 3),
+        "p99_ms": round(percentile(99), 3)
+    }
+
+def config_mismatches(config: Dict, baseline_config: Dict, keys: Sequence[str]) -> List[str]:
+    """Return a message for each of keys whose value differs between two result configs."""
+    return [
+        f"{key}: {config.get(key)!r}, baseline {baseline_config.get(key)!r}"
+        for key in keys
+        if config.get(key) != baseline_config.get(key)
+    ]
+
+def find_regressions(results: Dict, baseline: Dict, max_regression: float) -> List[str]:
+    """Compare scenario results with a baseline; return a message per regression."""
+    regressions = []
+    for scenario, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(scenario)
+        if not previous:
+            continue
+        if current['rps'] < previous['rps'] * (1 - max_regression):
+            regressions.append(f"{scenario}: {current['rps']} req/s, baseline {previous['rps']} req/s")
+        if current['p95_ms'] > previous['p95_ms'] * (1 + max_regression):
+            regressions.append(f"{scenario}: p95 {current['p95_ms']} ms, baseline {previous['p95_ms']} ms")
+        if current['errors'] > previous['errors']:
+            regressions.append(f"{scenario}: {current['errors']} errors, baseline {previous['errors']}")
+    return regressions
+
+def add_result_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the --output, --baseline, --save-baseline and --max-regression options."""
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    parser.add_argument('--baseline', help="JSON results to compare against")
+    parser.add_argument('--save-baseline', help="also write the results to this baseline file")
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help="allowed slowdown against the baseline as a fraction (default 0.2)")
+
+def save_results(results: Dict, args) -> None:
+    """Write results to the --output and --save-baseline files, if given."""
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as file:
+                json.dump(results, file, indent=4)
+
+def check_baseline(results: Dict, args, compared_config: Sequence[str],
+                   regressions_of: Callable[[Dict, Dict, float], List[str]]) -> None:
+    """
+    Compare results with the --baseline file, if given, and exit with status 1
+    when its configuration differs or regressions_of finds regressions.
+
+    Args:
+        results: Results of this run, with a 'config' entry
+        args: Parsed arguments from add_result_arguments()
+        compared_config: Config keys that must match the baseline's
+        regressions_of: Function like find_regressions() for these results
+    """
+    if not args.baseline:
+        return
+    with open(args.baseline, 'r') as file:
+        baseline = json.load(file)
+    mismatches = config_mismatches(results['config'], baseline.get('config', {}), compared_config)
+    if mismatches:
+        for mismatch in mismatches:
+            print(f"CONFIG MISMATCH {mismatch}")
+        print("Not comparing against a baseline run with another configuration.")
+        sys.exit(1)
+    regressions = regressions_of(results, baseline, args.max_regression)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print("No regressions against the baseline.")
+
+def run_benchmark(args, data_dir: Optional[str]) -> Dict:
+    from storage import close_repositories
+
+    stop = None
+    url = args.url
+    if not url:
+        config = {'DATA_DIR': data_dir, 'STORAGE_BACKEND': args.backend}
+        if args.app == 'flask':
+            from main import create_app
+        else:
+            from asgi import create_app
+        app = create_app(config)
+        if args.serve:
+            url, stop = (serve_flask if args.app == 'flask' else serve_asgi)(app)
+
+    results = {
+        "config": {
+            "app": args.app,
+            "backend": args.backend,
+            "target": url or 'in-process',
+            "players": args.players,
+            "planets": args.planets,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "python": platform.python_version()
+        },
+        "scenarios": {}
+    }
+    try:
+        for scenario in args.scenarios:
+            requests = make_requests(scenario, args.requests, args.players, args.planets)
+            # A short warm-up so connection setup and first loads don't count
+            warmup = requests[:max(1, len(requests) // 20)]
+            if url:
+                run_http(url, warmup, args.concurrency)
+                summary = summarize(*run_http(url, requests, args.concurrency))
+            elif args.app == 'flask':
+                run_flask(app, warmup, args.concurrency)
+                summary = summarize(*run_flask(app, requests, args.concurrency))
+            else:
+                run_asgi(app, warmup, args.concurrency)
+                summary = summarize(*run_asgi(app, requests, args.concurrency))
+            results['scenarios'][scenario] = summary
+            print(f"{scenario:<8} {summary['rps']:>10.1f} req/s   p50 {summary['p50_ms']:8.2f} ms   "
+                  f"p95 {summary['p95_ms']:8.2f} ms   p99 {summary['p99_ms']:8.2f} ms   errors {summary['errors']}")
+    finally:
+        if stop:
+            stop()
+        if not args.url and args.app == 'asgi':
+            app.close()
+        close_repositories()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test and latency benchmark for the API.")
+    parser.add_argument('--app', choices=['flask', 'asgi'], default='flask', help="app to benchmark")
+    parser.add_argument('--backend', choices=['json', 'sqlite'], default='json', help="storage backend")
+    parser.add_argument('--serve', action='store_true', help="serve the app on a local port and use real HTTP")
+    parser.add_argument('--url', help="benchmark an already running server instead, e.g. http://127.0.0.1:5000")
+    parser.add_argument('--players', type=int, default=1000, help="players in the generated world (10 to 1000000)")
+    parser.add_argument('--planets', type=int, default=1000, help="planets in the generated world (10 to 100000)")
+    parser.add_argument('--requests', type=int, default=5000, help="requests per scenario")
+    parser.add_argument('--concurrency', type=int, default=32, help="requests in flight at once")
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--generate', metavar='DIR', help="only write a world of the given size to DIR and exit")
+    add_result_arguments(parser)
+    args = parser.parse_args()
+
+    if args.generate:
+        make_world(args.generate, args.players, args.planets)
+        return
+
+    print(f"{args.app} app, {args.backend} backend, {args.url or ('local port' if args.serve else 'in-process')}, "
+          f"{args.players} players, {args.planets} planets, {args.requests} requests, concurrency {args.concurrency}")
+    if args.url:
+        # The server has its own data; request IDs assume it serves a world from --generate
+        results = run_benchmark(args, None)
+    else:
+        with tempfile.TemporaryDirectory() as data_dir:
+            make_world(data_dir, args.players, args.planets)
+            results = run_benchmark(args, data_dir)
+
+    save_results(results, args)
+    check_baseline(results, args, COMPARED_CONFIG, find_regressions)
+
+if __name__ == "__main__":
+    main()
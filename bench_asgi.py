@@ -0,0 +1,45 @@
+# FILE: bench_asgi.py
+"""
+Compare the Flask and ASGI apps on the same storage, in-process.
+
+Flask requests run through the test client on a thread pool, the way a
+threaded WSGI server would call the app; ASGI requests run as concurrent
+tasks on one event loop. No sockets are involved, so the numbers compare
+the request handling paths, not the HTTP servers in front of them.
+"""
+import argparse
+import tempfile
+import asgi
+from bench_api import make_requests, make_world, run_asgi, run_flask, summarize
+from main import create_app as create_flask_app
+from storage import close_repositories
+
+def report(name: str, summary) -> None:
+    print(f"{name:<14} {summary['rps']:>10.0f} req/s   p50 {summary['p50_ms']:7.2f} ms   p99 {summary['p99_ms']:7.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=5000, help="requests per run")
+    parser.add_argument('--concurrency', type=int, default=64, help="requests in flight at once")
+    parser.add_argument('--players', type=int, default=1000)
+    parser.add_argument('--planets', type=int, default=1000)
+    parser.add_argument('--backend', choices=['json', 'sqlite'], default='json')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        make_world(data_dir, args.players, args.planets)
+        config = {'DATA_DIR': data_dir, 'STORAGE_BACKEND': args.backend}
+        flask_app = create_flask_app(config)
+        asgi_app = asgi.create_app(config)
+
+        print(f"{args.requests} requests, concurrency {args.concurrency}, "
+              f"{args.players} players, {args.planets} planets, {args.backend} backend")
+        for kind in ('planet', 'move'):
+            requests = make_requests(kind, args.requests, args.players, args.planets)
+            report(f"flask {kind}", summarize(*run_flask(flask_app, requests, args.concurrency)))
+            report(f"asgi {kind}", summarize(*run_asgi(asgi_app, requests, args.concurrency)))
+        asgi_app.close()
+        close_repositories()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# FILE: bench_sim.py
+"""
+Throughput benchmark for the game simulation.
+
+Runs the simulation headlessly on a virtual clock, with no terminal, for
+the given number of ticks. The world around the player is filled with
+the requested number of asteroids, planets and moons, and the player
+follows a scripted random walk. Reports ticks per second and the time
+spent in each subsystem.
+
+The result options are shared with bench_api.py; against a --baseline,
+a drop in ticks per second beyond --max-regression fails the run.
+"""
+import argparse
+import platform
+import random
+import time
+from typing import Dict, List
+from bench_api import add_result_arguments, check_baseline, save_results
+from planet import Planet
+from player import Player
+from simulation import MOVES, Simulation, VirtualClock
+from world import CHUNK_SIZE, MOON_ORBIT_RADIUS, World
+
+# Ticks per second are only comparable with a baseline that simulated the same
+COMPARED_CONFIG = ('ticks', 'asteroids', 'planets', 'moons', 'view', 'move_every', 'seed')
+
+def make_planets(rng: random.Random, count: int, left: int, top: int, right: int, bottom: int) -> List[Dict]:
+    """Return planet data for count planets in the rectangle, clear of the player at (0, 0)."""
+    planets = []
+    while len(planets) < count:
+        x, y = rng.randrange(left, right), rng.randrange(top, bottom)
+        if abs(x) > 5 or abs(y) > 5:
+            planets.append({"planetId": f"bench{len(planets)}", "position": {"x": x, "y": y}, "size": rng.randint(1, 3)})
+    return planets
+
+def make_simulation(args) -> Simulation:
+    """Create a simulation with the requested asteroids, planets and moons around the player."""
+    rng = random.Random(args.seed)
+    player = Player("Benchmark")
+    # Enough of both that the game never ends before the run does
+    player.fuel = 10 ** 9
+    player.health = 10 ** 9
+
+    # Planets and moons go where the player's view and its margin of chunks will be
+    half_width = args.width // 2 + CHUNK_SIZE
+    half_height = args.height // 2 + CHUNK_SIZE
+    planet_data = make_planets(rng, args.planets, -half_width, -half_height, half_width, half_height)
+    world = World(args.seed, planet_data)
+
+    # Moons are added to their chunks before the simulation activates them
+    planets = [Planet(data["position"]["x"], data["position"]["y"], data["size"], data) for data in planet_data]
+    for i in range(args.moons):
+        if planets:
+            x, y = planets[i % len(planets)].x, planets[i % len(planets)].y
+        else:
+            x, y = rng.randrange(-half_width, half_width), rng.randrange(-half_height, half_height)
+        chunk = world.chunk(x // CHUNK_SIZE, y // CHUNK_SIZE)
+        chunk.moons.add(x, y, rng.randint(3, MOON_ORBIT_RADIUS), rng)
+    simulation = Simulation(player, world, args.height, args.width, clock=VirtualClock(), rng=rng, profile=True)
+
+    # Asteroids added in column order are appended without shifting the others
+    positions = sorted((rng.randrange(world.left, world.right), rng.randrange(world.top, world.bottom))
+                       for _ in range(args.asteroids))
+    for x, y in positions:
+        simulation.asteroids.add(x, y)
+    return simulation
+
+def run_benchmark(args) -> Dict:
+    simulation = make_simulation(args)
+    rng = random.Random(args.seed + 1)
+    directions = list(MOVES)
+    script = {tick: rng.choice(directions) for tick in range(0, args.ticks, args.move_every)} if args.move_every else {}
+
+    world = simulation.world
+    start_asteroids = len(simulation.asteroids)
+    start = time.perf_counter()
+    simulation.run(args.ticks, script)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "config": {
+            "ticks": args.ticks,
+            "asteroids": args.asteroids,
+            "planets": args.planets,
+            "moons": args.moons,
+            "view": [args.width, args.height],
+            "move_every": args.move_every,
+            "seed": args.seed,
+            "python": platform.python_version()
+        },
+        "results": {
+            "seconds": round(elapsed, 3),
+            "ticks_per_second": round(args.ticks / elapsed, 1),
+            "asteroids": [start_asteroids, len(simulation.asteroids)],
+            "active_planets": sum(len(chunk.planets) for chunk in world.active_chunks),
+            "active_moons": sum(len(chunk.moons) for chunk in world.active_chunks),
+            "subsystems_ms": {name: round(seconds * 1000, 3) for name, seconds in simulation.timings.items()}
+        }
+    }
+
+def find_regressions(results: Dict, baseline: Dict, max_regression: float) -> List[str]:
+    """Compare ticks per second with a baseline; return a message if they dropped too far."""
+    current = results["results"]["ticks_per_second"]
+    previous = baseline.get("results", {}).get("ticks_per_second")
+    if previous and current < previous * (1 - max_regression):
+        return [f"{current} ticks/s, baseline {previous} ticks/s"]
+    return []
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput benchmark for the game simulation.")
+    parser.add_argument('--ticks', type=int, default=5000, help="simulation ticks to run")
+    parser.add_argument('--asteroids', type=int, default=1000, help="asteroids in the active area at the start")
+    parser.add_argument('--planets', type=int, default=100, help="planets added around the player")
+    parser.add_argument('--moons', type=int, default=100, help="moons added around those planets")
+    parser.add_argument('--width', type=int, default=120, help="width of the player's view")
+    parser.add_argument('--height', type=int, default=40, help="height of the player's view")
+    parser.add_argument('--move-every', type=int, default=5, help="ticks between scripted moves, 0 to stand still")
+    parser.add_argument('--seed', type=int, default=1, help="seed for the world and the script")
+    add_result_arguments(parser)
+    args = parser.parse_args()
+
+    print(f"{args.ticks} ticks, {args.asteroids} asteroids, {args.planets} planets, {args.moons} moons, "
+          f"view {args.width}x{args.height}")
+    results = run_benchmark(args)
+    summary = results["results"]
+    print(f"{summary['ticks_per_second']:>10.1f} ticks/s   {summary['seconds']:.3f} s   "
+          f"asteroids {summary['asteroids'][0]} -> {summary['asteroids'][1]}")
+    for name, ms in summary["subsystems_ms"].items():
+        print(f"  {name:<12} {ms:10.1f} ms   {ms * 1000 / args.ticks:8.1f} us/tick")
+
+    save_results(results, args)
+    check_baseline(results, args, COMPARED_CONFIG, find_regressions)
+
+if __name__ == "__main__":
+    main()
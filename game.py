@@ -1,32 +1,19 @@
 # FILE: game.py
 import unicurses
-import random
-import time
-import json
+import os
 import uuid
 from player import Player
-from asteroid import Asteroid
 from planet import Planet
-from moon import Moon
+from renderer import Renderer
 from sound_manager import SoundManager
 from settings_manager import SettingsManager
+from simulation import OUT_OF_FUEL, Simulation, viewport
+from storage import close_repositories, get_repository
+from world import HOME_SIZE, World
 
-WORLD_WIDTH = 300
-WORLD_HEIGHT = 300
-NUM_PLANETS = 10
-NUM_MOONS_PER_PLANET = 1
-MOON_ORBIT_RADIUS = 5
-
-def load_players():
-    try:
-        with open('players.json', 'r') as file:
-            return json.load(file)
-    except FileNotFoundError:
-        return []
-
-def save_players(players):
-    with open('players.json', 'w') as file:
-        json.dump(players, file, indent=4)
+USE_PLANET_BITMAP = True  # rasterize planets into an occupancy bitmap instead of a grid index
+WORLD_SEED = 1  # seed the world is generated from, unless SPACE_EXPLORER_SEED is set
+WORLD_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'world.cache')  # snapshot of the generated chunks
 
 def get_string_input(stdscr, prompt, y, x):
     unicurses.echo()
@@ -77,9 +64,7 @@ def create_player_menu(stdscr):
                 "currentPlanetId": None
             }
             
-            players = load_players()
-            players.append(new_player)
-            save_players(players)
+            get_repository().add_player(new_player)
             
             unicurses.clear()
             unicurses.move(sh//2, sw//4)
@@ -91,7 +76,7 @@ def create_player_menu(stdscr):
             return None, None
 
 def select_player_menu(stdscr):
-    players = load_players()
+    players = get_repository().players()
     sound_manager = SoundManager()
     
     if not players:
@@ -321,61 +306,31 @@ def draw_pause_menu(buffer):
         elif key == 27:  # Escape key
             return "resume"
 
-def generate_planets():
-    planets = []
-    moons = []
-    planet_data = Planet.load_planets()
-    
-    # Create planets with data from planets.json
-    for data in planet_data:
-        x = data.get('position', {}).get('x', random.randint(0, WORLD_WIDTH - 1))
-        y = data.get('position', {}).get('y', random.randint(0, WORLD_HEIGHT - 1))
-        size = data.get('size', random.randint(1, 3))
-        planets.append(Planet(x, y, size, data))
-    
-    # Create additional random planets if needed
-    while len(planets) < NUM_PLANETS:
-        x = random.randint(0, WORLD_WIDTH - 1)
-        y = random.randint(0, WORLD_HEIGHT - 1)
-        size = random.randint(1, 3)
-        planets.append(Planet(x, y, size))
-
-    # Generate moons for planets
-    for planet in planets:
-        for _ in range(random.randint(0, NUM_MOONS_PER_PLANET)):
-            moon = Moon(planet.x, planet.y, random.randint(3, MOON_ORBIT_RADIUS))
-            moons.append(moon)
-            
-    return planets, moons
+def generate_world():
+    """
+    Create the world around the planets from storage.
 
-def generate_asteroids(num_asteroids, sw):
-    return [Asteroid(random.randint(0, WORLD_WIDTH - 1), 0) for _ in range(num_asteroids)]
+    Chunks saved by the last game with the same seed and planets are loaded
+    from WORLD_CACHE; the rest are generated as the player gets near them.
+    """
+    seed = int(os.environ.get('SPACE_EXPLORER_SEED', WORLD_SEED))
+    world = World(seed, Planet.load_planets(), USE_PLANET_BITMAP)
+    world.load(WORLD_CACHE)
+    return world
 
-def draw_world(buffer, player, planets, moons, asteroids):
-    sh, sw = unicurses.getmaxyx(buffer)
-    top = max(0, player.position["y"] - sh // 2)
-    left = max(0, player.position["x"] - sw // 2)
+def save_world(world):
+    try:
+        world.save(WORLD_CACHE)
+    except OSError:
+        pass  # The cache only saves time on the next start
 
-    # Clear the buffer and reset attributes
-    unicurses.werase(buffer)
-    unicurses.wattrset(buffer, unicurses.color_pair(3))  # Reset to default white
-
-    # Draw borders
-    for y in range(sh):
-        screen_x_left = 0 - left
-        screen_x_right = WORLD_WIDTH - 1 - left
-        if 0 <= screen_x_left < sw:
-            unicurses.mvwaddch(buffer, y, screen_x_left, ord('#'))
-        if 0 <= screen_x_right < sw:
-            unicurses.mvwaddch(buffer, y, screen_x_right, ord('#'))
-    
-    for x in range(sw):
-        screen_y_top = 0 - top
-        screen_y_bottom = WORLD_HEIGHT - 1 - top
-        if 0 <= screen_y_top < sh:
-            unicurses.mvwaddch(buffer, screen_y_top, x, ord('#'))
-        if 0 <= screen_y_bottom < sh:
-            unicurses.mvwaddch(buffer, screen_y_bottom, x, ord('#'))
+def draw_world(renderer, player, world, asteroids):
+    sh, sw = unicurses.getmaxyx(renderer.window)
+    left, top = viewport(player, sh, sw)
+    default_color = unicurses.color_pair(3)  # default white
+
+    # Only cells that differ from the last frame are written to the window
+    renderer.begin(top, left)
 
     # Set color based on health percentage
     health_color = unicurses.color_pair(3)  # default white
@@ -391,43 +346,25 @@ def draw_world(buffer, player, planets, moons, asteroids):
     elif player.fuel < 50:
         fuel_color = unicurses.color_pair(2)  # yellow
 
-    # Draw health with color
-    unicurses.wattrset(buffer, health_color)
-    unicurses.mvwaddstr(buffer, 0, 0, f"Life: {player.health}")
-    
-    # Draw fuel with color
-    unicurses.wattrset(buffer, fuel_color)
-    unicurses.mvwaddstr(buffer, 1, 0, f"Fuel: {player.fuel}")
-
-    # Reset color to default for remaining drawing
-    unicurses.wattrset(buffer, unicurses.color_pair(3))
-
-    # Draw planets
-    for planet in planets:
-        if top <= planet.y < top + sh and left <= planet.x < left + sw:
-            screen_y = planet.y - top
-            screen_x = planet.x - left
-            if 0 <= screen_y < sh and 0 <= screen_x < sw:
-                planet_symbol = planet.get_symbol().split('\n')
-                for i, line in enumerate(planet_symbol):
-                    if 0 <= screen_y + i < sh:
-                        unicurses.mvwaddstr(buffer, screen_y + i, screen_x, line)
-    
-    # Draw moons
-    for moon in moons:
-        if top <= moon.y < top + sh and left <= moon.x < left + sw:
-            screen_y = moon.y - top
-            screen_x = moon.x - left
-            if 0 <= screen_y < sh and 0 <= screen_x < sw:
-                unicurses.mvwaddstr(buffer, screen_y, screen_x, 'o')
+    # Draw health and fuel with color
+    renderer.put(0, 0, f"Life: {player.health}", health_color)
+    renderer.put(1, 0, f"Fuel: {player.fuel}", fuel_color)
+
+    # Draw planets, moons and asteroids, looking up only the chunks in view
+    chunks = world.chunks_in(left, top, left + sw, top + sh)
+    for chunk in chunks:
+        for planet in chunk.planets:
+            if top <= planet.y < top + sh and left <= planet.x < left + sw:
+                for i, line in enumerate(planet.sprite):
+                    renderer.put(planet.y - top + i, planet.x - left, line, default_color)
     
-    # Draw asteroids
-    for asteroid in asteroids:
-        if asteroid.visible and top <= asteroid.y < top + sh and left <= asteroid.x < left + sw:
-            screen_y = asteroid.y - top
-            screen_x = asteroid.x - left
-            if 0 <= screen_y < sh and 0 <= screen_x < sw:
-                unicurses.mvwaddch(buffer, screen_y, screen_x, ord('X'))
+    moon_xs, moon_ys = world.moons.in_rect(left, top, left + sw, top + sh)
+    for x, y in zip(moon_xs.tolist(), moon_ys.tolist()):
+        renderer.put(y - top, x - left, 'o', default_color)
+
+    asteroid_xs, asteroid_ys = asteroids.in_rect(left, top, left + sw, top + sh)
+    for x, y in zip(asteroid_xs.tolist(), asteroid_ys.tolist()):
+        renderer.put(y - top, x - left, 'X', default_color)
 
     # Draw player with direction and health-based character
     player_chars = {
@@ -437,185 +374,79 @@ def draw_world(buffer, player, planets, moons, asteroids):
         'right': '►' if player.health >= 50 else '▷'
     }
     player_char = player_chars.get(player.direction, '▲')  # Default to up arrow if direction is unknown
-    unicurses.mvwaddwstr(buffer, player.position["y"] - top, player.position["x"] - left, player_char)
-
-    # Refresh the buffer
-    unicurses.wnoutrefresh(buffer)
-    unicurses.doupdate()
+    renderer.put(player.position["y"] - top, player.position["x"] - left, player_char, default_color)
 
-def is_collision_with_planet(x, y, planets):
-    for planet in planets:
-        # Calculate distance between point and planet center using Pythagorean theorem
-        distance = ((planet.x - x) ** 2 + (planet.y - y) ** 2) ** 0.5
-        if distance <= planet.size:  # If distance is less than or equal to planet radius
-            return True
-    return False
+    renderer.finish()
 
-def game_loop(buffer, player, planets, moons, sh, sw):
+def game_loop(buffer, player, world, sh, sw):
     # Game settings
-    ASTEROID_SPEED = 15.0  # positions per second
-    ASTEROID_FREQUENCY = 5  # new asteroids per second
-    FUEL_REGEN_WAIT_TIME = 10.0  # seconds to wait before starting fuel regeneration
-    FUEL_REGEN_INTERVAL = 0.5  # seconds between each fuel regeneration
-    FUEL_REGEN_AMOUNT = 1  # amount of fuel to regenerate each time
     REFRESH_RATE = 0.05  # seconds between screen refreshes
+    MUSIC_CHECK_INTERVAL = 1.0  # seconds between checks for the next music track
+    MOVE_KEYS = {
+        unicurses.KEY_UP: 'up',
+        unicurses.KEY_DOWN: 'down',
+        unicurses.KEY_LEFT: 'left',
+        unicurses.KEY_RIGHT: 'right'
+    }
     
     sound_manager = SoundManager()  # Initialize sound manager
     sound_manager.play_background_music()  # Start with a random track
-    
-    last_move_time = time.time()
-    last_asteroid_time = time.time()
-    last_movement_time = time.time()  # Track when player last moved
-    last_fuel_regen_time = time.time()  # Track when fuel was last regenerated
-    last_refresh_time = time.time()   # Track when screen was last refreshed
-    fuel_regen_started = False  # Track if fuel regeneration has started
-    accumulated_movement = 0.0
 
-    # Set input to non-blocking
-    unicurses.nodelay(buffer, True)
+    simulation = Simulation(player, world, sh, sw)
+    scheduler = simulation.scheduler
 
-    # Create buffer window for double buffering
-    asteroids = []
-    asteroids = generate_asteroids(5, sw)
+    def check_music(dt):
+        sound_manager.check_and_play_next_track()
+
+    scheduler.every(MUSIC_CHECK_INTERVAL, check_music)
+    renderer = Renderer(buffer, unicurses.color_pair(3))
+    last_refresh_time = scheduler.clock()   # Track when screen was last refreshed
 
     while True:
-        current_time = time.time()
-        
-        # Get user input (non-blocking)
+        # Sleep in wgetch until a key arrives or the next frame is due. Simulation
+        # ticks in between are caught up when the loop wakes, before anything
+        # can observe them, so they don't need to wake it.
+        wait = last_refresh_time + REFRESH_RATE - scheduler.clock()
+        unicurses.wtimeout(buffer, max(0, int(wait * 1000 + 0.5)))
         key = unicurses.wgetch(buffer)
-        
-        # Store old position for collision check
-        old_x = player.position["x"]
-        old_y = player.position["y"]
-        moved = False
 
         # Handle player movement if there was input
-        if key != -1:  # -1 means no key was pressed
-            if key == unicurses.KEY_UP:
-                if player.fuel > 0:
-                    player.move_up()
-                    player.position["y"] = max(0, player.position["y"])
-                    moved = True
-            elif key == unicurses.KEY_DOWN:
-                if player.fuel > 0:
-                    player.move_down()
-                    player.position["y"] = min(WORLD_HEIGHT - 1, player.position["y"])
-                    moved = True
-            elif key == unicurses.KEY_LEFT:
-                if player.fuel > 0:
-                    player.move_left()
-                    player.position["x"] = max(0, player.position["x"])
-                    moved = True
-            elif key == unicurses.KEY_RIGHT:
-                if player.fuel > 0:
-                    player.move_right()
-                    player.position["x"] = min(WORLD_WIDTH - 1, player.position["x"])
-                    moved = True
-            elif key == ord('q'):
-                break
-            elif key == 27:  # Escape key
-                unicurses.nodelay(buffer, False)  # Set to blocking input for menu
-                choice = draw_pause_menu(buffer)
-                if choice == "main_menu":
-                    return "main_menu"
-                unicurses.nodelay(buffer, True)  # Set back to non-blocking
-                last_refresh_time = time.time()  # Reset timers
-                continue
-
-            # Check for collision with planets and revert if needed
-            if is_collision_with_planet(player.position["x"], player.position["y"], planets):
-                player.position["x"] = old_x
-                player.position["y"] = old_y
-                moved = False
-
-        # Update last movement time if player moved
-        if moved:
-            last_movement_time = current_time
-            fuel_regen_started = False  # Reset fuel regeneration when player moves
-        else:
-            # Check if player has been still long enough to start regenerating fuel
-            time_since_movement = current_time - last_movement_time
-            
-            if time_since_movement >= FUEL_REGEN_WAIT_TIME:
-                if not fuel_regen_started:
-                    fuel_regen_started = True
-                    last_fuel_regen_time = current_time
-                elif current_time - last_fuel_regen_time >= FUEL_REGEN_INTERVAL:
-                    if player.fuel < 500:  # Cap fuel at 500
-                        player.add_fuel(FUEL_REGEN_AMOUNT)
-                        last_fuel_regen_time = current_time
-
-        # Game over if out of fuel
-        if player.fuel <= 0:
+        if key in MOVE_KEYS:
+            simulation.move(MOVE_KEYS[key])
+        elif key == ord('q'):
+            break
+        elif key == 27:  # Escape key
+            unicurses.wtimeout(buffer, -1)  # Set to blocking input for menu
+            choice = draw_pause_menu(buffer)
+            if choice == "main_menu":
+                return "main_menu"
+            scheduler.resume()  # Don't simulate the time spent paused
+            renderer.invalidate()  # The pause menu drew over the world
+            last_refresh_time = scheduler.clock()  # Reset timers
+            continue
+
+        result = simulation.step()
+        if result:
+            message = "Out of Fuel! Game Over!" if result == OUT_OF_FUEL else "Game Over!"
             unicurses.clear()
-            unicurses.move(sh // 2, sw // 2 - len("Out of Fuel! Game Over!") // 2)
-            unicurses.addstr("Out of Fuel! Game Over!")
+            unicurses.move(sh // 2, sw // 2 - len(message) // 2)
+            unicurses.addstr(message)
             unicurses.refresh()
             unicurses.napms(2000)
             save_player_fuel(player)
             return
 
-        # Calculate time-based movement for asteroids
-        elapsed = current_time - last_move_time
-        accumulated_movement += ASTEROID_SPEED * elapsed
-        
-        while accumulated_movement >= 1.0:
-            # Move all asteroids down
-            for asteroid in asteroids:
-                if asteroid.visible:
-                    asteroid.move_down(1, planets)
-                    if asteroid.y >= WORLD_HEIGHT:
-                        asteroid.visible = False
-            accumulated_movement -= 1.0
-
-        last_move_time = current_time
-
-        # Generate new asteroids
-        if current_time - last_asteroid_time > 1.0 / ASTEROID_FREQUENCY:
-            new_asteroid_x = random.randint(0, WORLD_WIDTH - 1)
-            asteroids.append(Asteroid(new_asteroid_x, 0))
-            last_asteroid_time = current_time
-
-        # Check for collisions with asteroids
-        for asteroid in asteroids:
-            if asteroid.visible and asteroid.x == player.position["x"] and asteroid.y == player.position["y"]:
-                player.health -= 25
-                asteroid.visible = False
-
-                if player.health <= 0:
-                    unicurses.clear()
-                    unicurses.move(sh // 2, sw // 2 - len("Game Over!") // 2)
-                    unicurses.addstr("Game Over!")
-                    unicurses.refresh()
-                    unicurses.napms(2000)
-                    save_player_fuel(player)
-                    return
-
-        # Remove invisible asteroids
-        asteroids = [ast for ast in asteroids if ast.visible]
-
-        # Update moon positions
-        for moon in moons:
-            moon.move()
-
-        # Check if we need to play the next music track
-        sound_manager.check_and_play_next_track()
-
-        # Update screen at regular intervals
+        # Update screen at its own rate, independent of the simulation tick
+        current_time = scheduler.clock()
         if current_time - last_refresh_time >= REFRESH_RATE:
-            draw_world(buffer, player, planets, moons, asteroids)
+            draw_world(renderer, player, world, simulation.asteroids)
             last_refresh_time = current_time
 
-        # Small sleep to prevent CPU overuse
-        time.sleep(0.01)
-
 def save_player_fuel(player):
-    players = load_players()
-    for p in players:
+    for p in get_repository().players():
         if p["name"] == player.name:
-            p["inventory"]["fuel"] = player.fuel
+            get_repository().change_fuel(p["playerId"], player.fuel - p["inventory"]["fuel"])
             break
-    save_players(players)
 
 def main(stdscr):
     import locale
@@ -665,15 +496,16 @@ def main(stdscr):
 
     # Create player instance
     player = Player(current_player_name)
-    player.position["x"] = WORLD_WIDTH // 2
-    player.position["y"] = WORLD_HEIGHT // 2
+    player.position["x"] = HOME_SIZE // 2
+    player.position["y"] = HOME_SIZE // 2
 
-    # Generate random planets and moons
-    planets, moons = generate_planets()
+    # Create the world; its chunks are loaded from the cache or generated as the player gets near them
+    world = generate_world()
 
     # Start the game loop
     while True:
-        result = game_loop(buffer, player, planets, moons, sh, sw)
+        result = game_loop(buffer, player, world, sh, sw)
+        save_world(world)
         if result == "main_menu":
             # Stop background music
             sound_manager.stop_background_music()
@@ -690,4 +522,7 @@ def main(stdscr):
     sound_manager.stop_background_music()
 
 if __name__ == "__main__":
-    unicurses.wrapper(main)
\ No newline at end of file
+    try:
+        unicurses.wrapper(main)
+    finally:
+        close_repositories()
\ No newline at end of file
@@ -0,0 +1,194 @@
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+from persistence import FileLock, atomic_write
+
+# Record types
+NEW_PLAYER = 'new'
+FUEL_DELTA = 'fuel'
+LOCATION = 'loc'
+BASE = 'base'
+
+def new_player_record(player: Dict) -> Dict:
+    return {'op': NEW_PLAYER, 'player': player}
+
+def fuel_record(player_id: str, delta: int) -> Dict:
+    return {'op': FUEL_DELTA, 'id': player_id, 'd': delta}
+
+def location_record(player_id: str, planet_id: Optional[str]) -> Dict:
+    return {'op': LOCATION, 'id': player_id, 'p': planet_id}
+
+def base_record(snapshot_id: str) -> Dict:
+    return {'op': BASE, 'snapshot': snapshot_id}
+
+def record_player_id(record: Dict) -> str:
+    """Return the playerId of the player a record changes."""
+    return record['player']['playerId'] if record['op'] == NEW_PLAYER else record['id']
+
+def _lines(records: Sequence[Dict]) -> bytes:
+    return ''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in records).encode('utf-8')
+
+def apply_record(players: Dict[str, Dict], record: Dict) -> None:
+    """Apply a single journal record to players keyed by playerId."""
+    op = record['op']
+    if op == NEW_PLAYER:
+        players[record['player']['playerId']] = record['player']
+        return
+    player = players.get(record['id'])
+    if player is None:
+        return
+    if op == FUEL_DELTA:
+        player['inventory']['fuel'] += record['d']
+    elif op == LOCATION:
+        player['currentPlanetId'] = record['p']
+
+class Journal:
+    """
+    Append-only log of player mutations, one compact JSON record per line.
+
+    Base lines, the first line among them, name the snapshot the records
+    after them apply to (a hash of the players.json contents). Records for
+    another snapshot are skipped on replay, so a crash during compaction
+    neither applies a record twice nor loses it.
+
+    Several processes may append to the same journal while holding `lock`;
+    each one keeps track of how far it has read and catches up with the
+    records the others wrote before it appends its own.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.lock = FileLock(path + '.lock')
+        self.offset = 0  # Bytes of the journal applied so far
+        self._file = None
+        self._inode = None
+        self._base: Optional[str] = None
+        self._torn = False
+
+    def base(self) -> Optional[str]:
+        """Return the snapshot ID the journal applies to, as of the last sync."""
+        return self._base
+
+    def position(self) -> Tuple[Optional[int], int]:
+        """Return the journal file's inode and the offset read up to, to read the records after it later."""
+        return self._inode, self.offset
+
+    def replaced(self) -> bool:
+        """Return True if the journal file is no longer the one this process read."""
+        try:
+            return os.stat(self.path).st_ino != self._inode
+        except FileNotFoundError:
+            return self._inode is not None
+
+    def sync(self, players: Dict[str, Dict], snapshot_id: str, restart: bool = False) -> int:
+        """
+        Apply records appended since the last sync to players.
+
+        Args:
+            players: Players keyed by playerId, as loaded from the snapshot
+            snapshot_id: ID of that snapshot; records for another one are skipped
+            restart: Read the journal from the beginning
+
+        Returns:
+            Number of records applied
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            stat = None
+        if restart or stat is None or stat.st_ino != self._inode or stat.st_size < self.offset:
+            # New snapshot, or the journal was replaced by another process
+            self._close_file()
+            self._inode = stat.st_ino if stat else None
+            self._base = None
+            self.offset = 0
+            self._torn = False
+        if stat is None or stat.st_size == self.offset:
+            return 0
+
+        with open(self.path, 'rb') as file:
+            file.seek(self.offset)
+            data = file.read()
+        # Only complete lines; anything after the last newline is still being written
+        end = data.rfind(b'\n') + 1
+        count = 0
+        for line in data[:end].splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Torn write of a crashed process, followed by later records
+                continue
+            if record.get('op') == BASE:
+                self._base = record.get('snapshot')
+            elif self._base == snapshot_id:
+                apply_record(players, record)
+                count += 1
+        self.offset += end
+        self._torn = end < len(data)
+        return count
+
+    def records(self, start: int, snapshot_id: str) -> List[Dict]:
+        """
+        Return the records for snapshot_id from offset start to the offset read up to.
+
+        The caller must hold `lock` and have synced since getting start from
+        position(), with the journal file unchanged.
+        """
+        with open(self.path, 'rb') as file:
+            file.seek(start)
+            data = file.read(self.offset - start)
+        base = snapshot_id
+        records = []
+        for line in data.splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get('op') == BASE:
+                base = record.get('snapshot')
+            elif base == snapshot_id:
+                records.append(record)
+        return records
+
+    def append(self, records: List[Dict]) -> int:
+        """
+        Append records with a single write so they land together.
+
+        The caller must hold `lock` and have synced, so the journal ends where
+        this process stopped reading.
+
+        Returns:
+            Number of bytes written
+        """
+        data = _lines(records)
+        if self._torn:
+            # Terminate a crashed writer's partial line so ours stays parseable
+            data = b'\n' + data
+            self._torn = False
+        if self._file is None:
+            self._file = open(self.path, 'ab')
+            self._inode = os.fstat(self._file.fileno()).st_ino
+        self._file.write(data)
+        self._file.flush()
+        self.offset += len(data)
+        for record in records:
+            if record['op'] == BASE:
+                self._base = record['snapshot']
+        return len(data)
+
+    def reset(self, snapshot_id: str, records: Sequence[Dict] = ()) -> None:
+        """Start a new journal with records on top of a freshly written snapshot; hold `lock`."""
+        self._close_file()
+        data = _lines([base_record(snapshot_id), *records])
+        atomic_write(self.path, data)
+        self._inode = os.stat(self.path).st_ino
+        self._base = snapshot_id
+        self.offset = len(data)
+        self._torn = False
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self) -> None:
+        self._close_file()
@@ -1,91 +1,42 @@
 # FILE: main.py
-import json
-from flask import Flask, request, jsonify
+import os
+from typing import Dict, Optional
+from flask import Flask
 from routes import bp as routes_bp
-
-app = Flask(__name__)
-app.register_blueprint(routes_bp)
-
-def load_planets():
-    with open('planets.json', 'r') as file:
-        return json.load(file)
-
-def load_players():
-    with open('players.json', 'r') as file:
-        return json.load(file)
-
-def save_players(players):
-    with open('players.json', 'w') as file:
-        json.dump(players, file, indent=4)
-
-@app.route('/planet', methods=['GET'])
-def get_planet():
-    planet_id = request.args.get('planetId')
-    planets = load_planets()
-    for planet in planets:
-        if planet['planetId'] == planet_id:
-            return jsonify(planet)
-    return jsonify({"error": "Planet not found"}), 404
-
-@app.route('/move', methods=['POST'])
-def move_to_planet():
-    data = request.get_json()
-    if not data:
-        return jsonify({"error": "No JSON data provided"}), 400
-    
-    player_id = data.get('player_id')
-    destination_planet_id = data.get('destination_planet_id')
-    
-    # Load data
-    players = load_players()
-    planets = load_planets()
-    
-    # Find player and planet
-    player = None
-    destination_planet = None
-    
-    for p in players:
-        if p['playerId'] == player_id:
-            player = p
-            break
-    
-    for p in planets:
-        if p['planetId'] == destination_planet_id:
-            destination_planet = p
-            break
-    
-    if not player or not destination_planet:
-        return jsonify({
-            "error": "Spieler oder Planet nicht gefunden",
-            "message": "Bewegung nicht möglich"
-        }), 404
-    
-    # Check if player has enough fuel
-    if player['inventory']['fuel'] < 10:
-        return jsonify({
-            "error": "Nicht genug Treibstoff",
-            "message": "Mindestens 10 Treibstoffeinheiten benötigt"
-        }), 400
-    
-    # Update player's fuel and current planet
-    player['inventory']['fuel'] -= 10
-    player['currentPlanetId'] = destination_planet_id
-    
-    # Save updated player data
-    save_players(players)
-    
-    # Prepare response
-    response = {
-        "player": player,
-        "planet": destination_planet,
-        "message": f"Du bist zu einem neuen Planeten gereist:\n\t→ {destination_planet['name']}. Treibstoffverbrauch: 10 Einheiten."
-    }
-    
-    return jsonify(response)
+from storage import close_repositories, get_repository
+
+def create_app(config: Optional[Dict] = None) -> Flask:
+    """
+    Create the API app.
+
+    Args:
+        config: Overrides for the app config. DATA_DIR is the directory with
+            planets.json and players.json, STORAGE_BACKEND is 'json' or 'sqlite'.
+            Both default to the SPACE_EXPLORER_DATA_DIR and
+            SPACE_EXPLORER_STORAGE environment variables.
+
+    Returns:
+        The Flask app. Apps with the same data directory and backend share
+        one repository, and with it its loaded data.
+    """
+    app = Flask(__name__)
+    app.config.update(
+        DATA_DIR=os.environ.get('SPACE_EXPLORER_DATA_DIR'),
+        STORAGE_BACKEND=os.environ.get('SPACE_EXPLORER_STORAGE')
+    )
+    if config:
+        app.config.update(config)
+    app.extensions['repository'] = get_repository(app.config['STORAGE_BACKEND'], app.config['DATA_DIR'])
+    app.register_blueprint(routes_bp)
+    return app
 
 def main():
     print("Welcome to Space Explorer Console Game!")
-    app.run(debug=True)
+    app = create_app({'DEBUG': True})
+    try:
+        app.run()
+    finally:
+        close_repositories()
 
 if __name__ == "__main__":
     main()
@@ -1,21 +1,119 @@
 import random
+from typing import Sequence
+import numpy as np
+from spatial_index import SpatialGrid
 
-class Moon:
-    def __init__(self, planet_x: int, planet_y: int, orbit_radius: int):
-        self.orbit_radius = orbit_radius
-        self.planet_x = planet_x
-        self.planet_y = planet_y
-        self.angle = random.uniform(0, 360)  # Random starting position
-        self.speed = random.uniform(0.5, 2.0)  # Random orbit speed
-        self.update_position()
-    
-    def update_position(self):
-        """Update moon position based on orbit angle"""
-        import math
-        self.x = int(self.planet_x + self.orbit_radius * math.cos(math.radians(self.angle)))
-        self.y = int(self.planet_y + self.orbit_radius * math.sin(math.radians(self.angle)))
-    
-    def move(self):
-        """Move the moon in its orbit"""
-        self.angle = (self.angle + self.speed) % 360
-        self.update_position()
\ No newline at end of file
+ORBIT_STEPS = 360  # positions per orbit in the lookup tables, one per degree
+_ORBIT_ANGLES = np.arange(ORBIT_STEPS) * (2 * np.pi / ORBIT_STEPS)
+COS_TABLE = np.cos(_ORBIT_ANGLES)
+SIN_TABLE = np.sin(_ORBIT_ANGLES)
+MIN_ORBIT_STEPS = 4  # positions per orbit for the smallest orbits
+_ARRAYS = ('planet_x', 'planet_y', 'orbit_radius', 'orbit_steps', 'angle', 'speed', 'step', 'x', 'y')
+
+class MoonSystem:
+    """
+    All moons in the world, stored as parallel NumPy arrays.
+
+    Moon i orbits (planet_x[i], planet_y[i]) at orbit_radius[i], at
+    angle[i] degrees and speed[i] degrees per second. An orbit has
+    orbit_steps[i] positions, about one per cell of its circumference, so a
+    moon moves to a new step about as often as it moves to a new cell.
+    Positions come from precomputed sine and cosine tables, and are only
+    recomputed for moons that moved to a new step.
+    """
+    def __init__(self, capacity: int = 16) -> None:
+        self.count = 0
+        self.planet_x = np.zeros(capacity, dtype=np.int32)
+        self.planet_y = np.zeros(capacity, dtype=np.int32)
+        self.orbit_radius = np.zeros(capacity, dtype=np.int32)
+        self.orbit_steps = np.zeros(capacity, dtype=np.int32)
+        self.angle = np.zeros(capacity, dtype=np.float64)
+        self.speed = np.zeros(capacity, dtype=np.float64)
+        self.step = np.zeros(capacity, dtype=np.int32)
+        self.x = np.zeros(capacity, dtype=np.int32)
+        self.y = np.zeros(capacity, dtype=np.int32)
+        # A moon never leaves the bounding box of its orbit, so this grid never needs updating
+        self.grid = SpatialGrid()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, planet_x: int, planet_y: int, orbit_radius: int, rng: random.Random = random) -> None:
+        """Add a moon orbiting (planet_x, planet_y) at an angle and speed drawn from rng."""
+        angle = rng.uniform(0, 360)  # Random starting position
+        speed = rng.uniform(50, 200)  # Random orbit speed in degrees per second
+        self.add_orbit(planet_x, planet_y, orbit_radius, angle, speed)
+
+    def add_orbit(self, planet_x: int, planet_y: int, orbit_radius: int, angle: float, speed: float) -> None:
+        """Add a moon orbiting (planet_x, planet_y), starting at angle degrees and moving speed degrees per second."""
+        if self.count == len(self.x):
+            self._grow(2 * self.count)
+        i = self.count
+        self.planet_x[i] = planet_x
+        self.planet_y[i] = planet_y
+        self.orbit_radius[i] = orbit_radius
+        self.orbit_steps[i] = max(MIN_ORBIT_STEPS, round(2 * np.pi * orbit_radius))
+        self.angle[i] = angle
+        self.speed[i] = speed
+        self.count += 1
+        moons = np.array([i])
+        self._update_positions(moons, self._steps(moons))
+        self.grid.insert(i, planet_x - orbit_radius, planet_y - orbit_radius, planet_x + orbit_radius, planet_y + orbit_radius)
+
+    @classmethod
+    def merge(cls, systems: Sequence['MoonSystem']) -> 'MoonSystem':
+        """Return a new system with a copy of the moons of each system, in order."""
+        count = sum(len(system) for system in systems)
+        merged = cls(max(count, 1))
+        if count:
+            for name in _ARRAYS:
+                getattr(merged, name)[:count] = np.concatenate([getattr(system, name)[:system.count] for system in systems])
+        merged.count = count
+        for i, (x, y, radius) in enumerate(zip(merged.planet_x[:count].tolist(), merged.planet_y[:count].tolist(),
+                                               merged.orbit_radius[:count].tolist())):
+            merged.grid.insert(i, x - radius, y - radius, x + radius, y + radius)
+        return merged
+
+    def update_from(self, source: 'MoonSystem', start: int) -> None:
+        """Take the orbit positions of this system's moons from source, where they start at moon start."""
+        n = self.count
+        for name in ('angle', 'step', 'x', 'y'):
+            getattr(self, name)[:n] = getattr(source, name)[start:start + n]
+
+    def _grow(self, capacity: int) -> None:
+        for name in _ARRAYS:
+            old = getattr(self, name)
+            new = np.zeros(max(capacity, 1), dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def move(self, dt: float) -> None:
+        """Move every moon along its orbit for dt seconds."""
+        n = self.count
+        angle = self.angle[:n]
+        angle += self.speed[:n] * dt
+        angle %= 360
+        steps = self.orbit_steps[:n]
+        step = (angle * steps / 360).astype(np.int32) % steps
+        changed = np.flatnonzero(step != self.step[:n])
+        if len(changed):
+            self._update_positions(changed, step[changed])
+
+    def _steps(self, moons: np.ndarray) -> np.ndarray:
+        steps = self.orbit_steps[moons]
+        return (self.angle[moons] * steps / 360).astype(np.int32) % steps
+
+    def _update_positions(self, moons: np.ndarray, step: np.ndarray) -> None:
+        self.step[moons] = step
+        # The angle of the step, rounded down to a whole degree for the lookup tables
+        table = step * ORBIT_STEPS // self.orbit_steps[moons]
+        radius = self.orbit_radius[moons]
+        self.x[moons] = (self.planet_x[moons] + radius * COS_TABLE[table]).astype(np.int32)
+        self.y[moons] = (self.planet_y[moons] + radius * SIN_TABLE[table]).astype(np.int32)
+
+    def in_rect(self, left: int, top: int, right: int, bottom: int):
+        """Return x and y arrays of the moons with left <= x < right and top <= y < bottom."""
+        moons = np.array(self.grid.query(left, top, right, bottom), dtype=np.intp)
+        x, y = self.x[moons], self.y[moons]
+        mask = (x >= left) & (x < right) & (y >= top) & (y < bottom)
+        return x[mask], y[mask]
@@ -0,0 +1,176 @@
+import atexit
+import os
+import tempfile
+import threading
+from typing import Callable, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Read once at import, since os.umask() can only be read by changing it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def write_temp(path: str, data: Union[str, bytes]) -> str:
+    """
+    Write data to a new temp file next to path and fsync it.
+
+    The file keeps the permissions of path, or gets the usual ones for a
+    new file. os.replace() it over path to publish the data atomically.
+
+    Returns:
+        The temp file's path
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        # mkstemp creates the file readable by its owner only
+        os.chmod(tmp_path, mode)
+        with os.fdopen(fd, 'wb' if isinstance(data, bytes) else 'w') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+    except BaseException:
+        remove_temp(tmp_path)
+        raise
+    return tmp_path
+
+def remove_temp(tmp_path: str) -> None:
+    """Delete a temp file from write_temp() that was not published."""
+    try:
+        os.unlink(tmp_path)
+    except OSError:
+        pass
+
+def atomic_write(path: str, data: Union[str, bytes]) -> None:
+    """
+    Write data to path without ever exposing a partially written file.
+
+    The data (text, or bytes for binary files) goes to a temp file in the
+    same directory, is fsynced and then renamed over the target, which is
+    atomic on POSIX and Windows.
+    """
+    tmp_path = write_temp(path, data)
+    try:
+        os.replace(tmp_path, path)
+    except BaseException:
+        remove_temp(tmp_path)
+        raise
+
+class FileLock:
+    """
+    Exclusive lock shared by all threads and processes using the same path.
+
+    Re-entrant within a thread. The OS lock is held on a separate lock file,
+    so the data files themselves can still be replaced atomically.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._file = None
+        self._pid = None
+        self._depth = 0
+
+    def __enter__(self) -> 'FileLock':
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                if self._file is None or self._pid != os.getpid():
+                    # A forked child must not share the parent's open file,
+                    # otherwise both hold the same flock
+                    self._file = open(self.path, 'a+')
+                    self._pid = os.getpid()
+                if fcntl:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+                else:
+                    self._file.seek(0)
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._thread_lock.release()
+
+class WriteBehindWriter:
+    """
+    Counts pending writes and hands them to a flush callback in batches.
+
+    A background thread flushes every `interval` seconds, or sooner once
+    `max_pending` writes are pending. Remaining writes are flushed at shutdown.
+    """
+    def __init__(self, flush: Callable[[], None], interval: float = 1.0, max_pending: int = 256) -> None:
+        self._flush = flush
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = os.getpid()
+        self._closed = False
+
+    def add(self, count: int = 1) -> None:
+        """Schedule count more writes for the next batch."""
+        with self._lock:
+            self._pending += count
+            if self._pid != os.getpid():
+                # Threads don't survive a fork; a preloaded worker needs its own
+                self._thread = None
+                self._pid = os.getpid()
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+            if self._pending >= self.max_pending:
+                self._wakeup.set()
+
+    def flush(self) -> None:
+        """Write everything pending now."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, 0
+            if not pending:
+                return
+            try:
+                self._flush()
+            except BaseException:
+                # Still pending, so the next flush retries
+                with self._lock:
+                    self._pending += pending
+                raise
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                # Keep the thread alive; the failed batch is retried on the next flush
+                print(f"Error flushing pending writes: {e!r}")
+
+    def close(self) -> None:
+        """Stop the background thread and flush whatever is left."""
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.flush()
@@ -1,50 +1,58 @@
-import json
-import random
-from typing import Dict, List, Optional
+import itertools
+import zlib
+from typing import Dict, List, Optional, Tuple
+from storage import get_repository
+
+# Different planet designs, 3 rows of 3 characters each
+PLANET_DESIGNS = (
+    ('╭─╮',
+     '│○│',
+     '╰─╯'),
+
+    ('┌◆┐',
+     '◆●◆',
+     '└◆┘'),
+
+    ('╔═╗',
+     '║◉║',
+     '╚═╝'),
+
+    ('⌜~⌝',
+     '∘◍∘',
+     '⌞~⌟'),
+
+    ('╭◠╮',
+     '│◎│',
+     '╰◡╯')
+)
+
+# Numbers planets created without an ID, so no two of them share one
+_unnamed_ids = itertools.count(1)
 
 class Planet:
     def __init__(self, x: int, y: int, size: int, planet_data: Optional[Dict] = None) -> None:
         self.x = x
         self.y = y
         self.size = size
-        self.planet_id = planet_data.get('planetId') if planet_data else f"planet{random.randint(1000, 9999)}"
+        planet_data = planet_data or {}
+        self.planet_id = planet_data.get('planetId') or f"planet_unnamed_{next(_unnamed_ids)}"
         self.name = planet_data.get('name', 'Unknown Planet')
         self.resources = planet_data.get('resources', {})
         self.hazards = planet_data.get('hazards', [])
+        # Select a design based on the planet's ID to keep it consistent. crc32 is used
+        # because hash() of a str changes between runs.
+        self.sprite: Tuple[str, ...] = PLANET_DESIGNS[zlib.crc32(self.planet_id.encode()) % len(PLANET_DESIGNS)]
         
     def is_collision(self, x: int, y: int) -> bool:
         """Check if given coordinates collide with the planet."""
-        distance = ((self.x - x) ** 2 + (self.y - y) ** 2) ** 0.5
-        return distance <= self.size
+        # Compare squared distances, no square root needed
+        dx = self.x - x
+        dy = self.y - y
+        return dx * dx + dy * dy <= self.size * self.size
         
     def get_symbol(self) -> str:
         """Return a 3x3 planet design."""
-        # Different planet designs
-        planet_designs = [
-            ['╭─╮',
-             '│○│',
-             '╰─╯'],
-            
-            ['┌◆┐',
-             '◆●◆',
-             '└◆┘'],
-             
-            ['╔═╗',
-             '║◉║',
-             '╚═╝'],
-             
-            ['⌜~⌝',
-             '∘◍∘',
-             '⌞~⌟'],
-             
-            ['╭◠╮',
-             '│◎│',
-             '╰◡╯']
-        ]
-        
-        # Select a design based on the planet's ID to keep it consistent
-        design_index = hash(self.planet_id) % len(planet_designs)
-        return '\n'.join(planet_designs[design_index])
+        return '\n'.join(self.sprite)
 
     def to_dict(self) -> Dict:
         """Convert planet data to dictionary format."""
@@ -59,9 +67,5 @@ class Planet:
     
     @staticmethod
     def load_planets() -> List[Dict]:
-        """Load planet data from planets.json."""
-        try:
-            with open('planets.json', 'r') as file:
-                return json.load(file)
-        except FileNotFoundError:
-            return []
\ No newline at end of file
+        """Load planet data from the configured storage backend."""
+        return get_repository().planets()
\ No newline at end of file
@@ -0,0 +1,71 @@
+# FILE: renderer.py
+from typing import Dict, Optional, Tuple
+import unicurses
+
+Cell = Tuple[str, int]  # (character, attribute)
+
+class Renderer:
+    """
+    Incremental renderer for a curses window.
+
+    Each frame is collected as a map of screen cells to glyphs and compared
+    with the previous frame, so only cells that changed are written. The
+    whole window is redrawn only when the viewport scrolls, the window is
+    resized or invalidate() is called.
+    """
+    def __init__(self, window, blank_attr: int = 0) -> None:
+        self.window = window
+        self.blank_attr = blank_attr
+        self._cells: Dict[Tuple[int, int], Cell] = {}
+        self._frame: Dict[Tuple[int, int], Cell] = {}
+        self._view: Optional[Tuple[int, int, int, int]] = None
+        self._top = 0
+        self._left = 0
+        self.height = 0
+        self.width = 0
+
+    def invalidate(self) -> None:
+        """Redraw everything on the next frame, e.g. after something else drew on the window."""
+        self._view = None
+
+    def begin(self, top: int, left: int) -> None:
+        """Start a frame showing the world from (left, top)."""
+        self.height, self.width = unicurses.getmaxyx(self.window)
+        self._frame = {}
+        self._top = top
+        self._left = left
+
+    def put(self, y: int, x: int, text: str, attr: int) -> None:
+        """Draw text at screen position (y, x), clipped to the window. Later calls draw on top."""
+        if not 0 <= y < self.height:
+            return
+        frame = self._frame
+        for i, char in enumerate(text):
+            if 0 <= x + i < self.width:
+                frame[(y, x + i)] = (char, attr)
+
+    def finish(self) -> None:
+        """Write the frame's changes to the window and update the screen."""
+        window = self.window
+        view = (self._top, self._left, self.height, self.width)
+        if view != self._view:
+            # Scrolled or resized: every cell may have changed
+            unicurses.werase(window)
+            changes = self._frame.items()
+            self._view = view
+        else:
+            old = self._cells
+            blank = (' ', self.blank_attr)
+            changes = [(pos, blank) for pos in old if pos not in self._frame]
+            changes += [(pos, cell) for pos, cell in self._frame.items() if old.get(pos) != cell]
+
+        current_attr = None
+        for (y, x), (char, attr) in changes:
+            if attr != current_attr:
+                unicurses.wattrset(window, attr)
+                current_attr = attr
+            unicurses.mvwaddstr(window, y, x, char)
+
+        self._cells = self._frame
+        unicurses.wnoutrefresh(window)
+        unicurses.doupdate()
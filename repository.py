@@ -0,0 +1,80 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+class Repository:
+    """
+    Storage interface for players and planets shared by the API and the game.
+
+    Players and planets are exchanged as the same dictionaries that
+    players.json and planets.json contain.
+    """
+    def get_planet(self, planet_id: str) -> Optional[Dict]:
+        """Return the planet with the given ID, or None."""
+        raise NotImplementedError
+
+    def planets(self) -> List[Dict]:
+        """Return all planets."""
+        raise NotImplementedError
+
+    def get_planets(self, planet_ids: Sequence[str]) -> List[Dict]:
+        """Return the planets with the given IDs that exist, in request order."""
+        planets = (self.get_planet(planet_id) for planet_id in planet_ids)
+        return [planet for planet in planets if planet]
+
+    def planet_page(self, offset: int, limit: int) -> Tuple[List[Dict], int]:
+        """Return up to limit planets starting at offset, and the total planet count."""
+        planets = self.planets()
+        return planets[offset:offset + limit], len(planets)
+
+    def planets_modified(self) -> Optional[float]:
+        """Return when the planet data last changed as a Unix timestamp, if known."""
+        return None
+
+    def get_player(self, player_id: str) -> Optional[Dict]:
+        """Return the player with the given ID, or None."""
+        raise NotImplementedError
+
+    def players(self) -> List[Dict]:
+        """Return all players in creation order."""
+        raise NotImplementedError
+
+    def add_player(self, player: Dict) -> None:
+        """Add a new player."""
+        raise NotImplementedError
+
+    def change_fuel(self, player_id: str, delta: int) -> None:
+        """Add delta (negative to consume) to a player's fuel."""
+        raise NotImplementedError
+
+    def move_player(self, player_id: str, planet_id: str, fuel_cost: int) -> Optional[Dict]:
+        """
+        Atomically consume fuel and move the player to a planet.
+
+        Args:
+            player_id: ID of the player to move
+            planet_id: ID of the destination planet
+            fuel_cost: Fuel the move costs
+
+        Returns:
+            The updated player, or None if the player has less than fuel_cost fuel
+        """
+        raise NotImplementedError
+
+    def move_players(self, moves: Sequence[Tuple[str, str]], fuel_cost: int) -> List[Optional[Dict]]:
+        """
+        Apply many moves as one batch, in order.
+
+        Args:
+            moves: (player_id, planet_id) pairs
+            fuel_cost: Fuel each move costs
+
+        Returns:
+            For each move, the updated player or None if it lacked fuel
+        """
+        return [self.move_player(player_id, planet_id, fuel_cost) for player_id, planet_id in moves]
+
+    def flush(self) -> None:
+        """Make all changes durable now."""
+
+    def close(self) -> None:
+        """Flush and release any resources."""
+        self.flush()
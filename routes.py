@@ -1,18 +1,56 @@
 # FILE: routes.py
-import json
-from flask import Blueprint, request, jsonify
+from datetime import datetime, timezone
+from flask import Blueprint, current_app, request, jsonify
+import api
+from repository import Repository
 
 bp = Blueprint('routes', __name__)
 
-def load_planets():
-    with open('planets.json', 'r') as file:
-        return json.load(file)
+def get_repository() -> Repository:
+    """Return the storage backend of the current app."""
+    return current_app.extensions['repository']
+
+def cacheable(response):
+    """
+    Add ETag, Last-Modified and Cache-Control to a planet response.
+
+    The ETag is a hash of the response body, so it only changes when the
+    planet data does. Requests with a matching If-None-Match or a current
+    If-Modified-Since get an empty 304 Not Modified instead.
+    """
+    response.add_etag()
+    modified = get_repository().planets_modified()
+    if modified is not None:
+        response.last_modified = datetime.fromtimestamp(modified, tz=timezone.utc)
+    response.cache_control.public = True
+    response.cache_control.max_age = api.PLANET_CACHE_MAX_AGE
+    return response.make_conditional(request)
 
 @bp.route('/planet', methods=['GET'])
 def get_planet():
-    planet_id = request.args.get('planetId')
-    planets = load_planets()
-    for planet in planets:
-        if planet['planetId'] == planet_id:
-            return jsonify(planet)
-    return jsonify({"error": "Planet not found"}), 404
\ No newline at end of file
+    body, status = api.get_planet(get_repository(), request.args.get('planetId'))
+    if status == 200:
+        return cacheable(jsonify(body))
+    return jsonify(body), status
+
+@bp.route('/planets', methods=['GET'])
+def get_planets():
+    body, status = api.get_planets(
+        get_repository(),
+        request.args.get('ids'),
+        request.args.get('page', 1, type=int),
+        request.args.get('per_page', api.DEFAULT_PAGE_SIZE, type=int)
+    )
+    if status == 200:
+        return cacheable(jsonify(body))
+    return jsonify(body), status
+
+@bp.route('/move', methods=['POST'])
+def move_to_planet():
+    body, status = api.move(get_repository(), request.get_json())
+    return jsonify(body), status
+
+@bp.route('/move/batch', methods=['POST'])
+def move_batch():
+    body, status = api.move_batch(get_repository(), request.get_json())
+    return jsonify(body), status
@@ -0,0 +1,64 @@
+# FILE: scheduler.py
+import time
+from typing import Callable, List
+
+class _Task:
+    def __init__(self, interval: int, next_tick: int, handler: Callable[[float], None]) -> None:
+        self.interval = interval
+        self.next_tick = next_tick
+        self.handler = handler
+
+class Scheduler:
+    """
+    Fixed-timestep scheduler for the game simulation.
+
+    Simulation time advances in whole ticks, so handlers see the same
+    sequence of calls however fast or slow the loop around them runs. When
+    the loop falls more than max_catch_up ticks behind, the backlog is
+    dropped and the game slows down instead of stalling further.
+    """
+    def __init__(self, tick: float = 0.02, max_catch_up: int = 10, clock: Callable[[], float] = time.monotonic) -> None:
+        self.tick = tick
+        self.max_catch_up = max_catch_up
+        self.clock = clock
+        self.ticks = 0
+        self._tasks: List[_Task] = []
+        self._origin = clock()  # clock time of tick 0
+
+    @property
+    def time(self) -> float:
+        """Simulation time in seconds."""
+        return self.ticks * self.tick
+
+    def every(self, period: float, handler: Callable[[float], None]) -> None:
+        """
+        Call handler(dt) every period seconds of simulation time.
+
+        Args:
+            period: Seconds between calls, rounded to whole ticks (at least one)
+            handler: Called with the simulated seconds since its last call
+        """
+        interval = max(1, round(period / self.tick))
+        self._tasks.append(_Task(interval, self.ticks + interval, handler))
+
+    def run_pending(self) -> int:
+        """Run every tick that is due, up to max_catch_up, and return how many ran."""
+        due = int((self.clock() - self._origin) / self.tick) - self.ticks
+        if due > self.max_catch_up:
+            self._origin += (due - self.max_catch_up) * self.tick
+            due = self.max_catch_up
+        self.run_ticks(due)
+        return max(due, 0)
+
+    def run_ticks(self, count: int) -> None:
+        """Run the next count ticks right away, whatever the clock says."""
+        for _ in range(count):
+            self.ticks += 1
+            for task in self._tasks:
+                if task.next_tick == self.ticks:
+                    task.next_tick += task.interval
+                    task.handler(task.interval * self.tick)
+
+    def resume(self) -> None:
+        """Continue from the current simulation time, skipping the time spent paused."""
+        self._origin = self.clock() - self.ticks * self.tick
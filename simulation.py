@@ -0,0 +1,223 @@
+# FILE: simulation.py
+import random
+import time
+from typing import Callable, Dict, Mapping, Optional, Tuple
+from asteroid import AsteroidField
+from player import Player
+from scheduler import Scheduler
+from world import World
+
+ASTEROID_SPEED = 15.0  # positions per second
+ASTEROID_FREQUENCY = 5  # new asteroids per second
+ASTEROID_DAMAGE = 25  # health lost per asteroid hit
+INITIAL_ASTEROIDS = 5  # asteroids at the start of a game
+FUEL_REGEN_WAIT_TIME = 10.0  # seconds to wait before starting fuel regeneration
+FUEL_REGEN_INTERVAL = 0.5  # seconds between each fuel regeneration
+FUEL_REGEN_AMOUNT = 1  # amount of fuel to regenerate each time
+SIMULATION_TICK = 0.02  # seconds of game time per simulation step
+
+# Reasons step() and run() end the game
+OUT_OF_FUEL = 'out_of_fuel'
+DESTROYED = 'destroyed'
+
+MOVES = {
+    'up': Player.move_up,
+    'down': Player.move_down,
+    'left': Player.move_left,
+    'right': Player.move_right
+}
+
+def viewport(player: Player, height: int, width: int) -> Tuple[int, int]:
+    """Return the world coordinates (left, top) of the top left corner of a view centered on the player."""
+    return player.position["x"] - width // 2, player.position["y"] - height // 2
+
+class VirtualClock:
+    """Clock for the scheduler that only moves when advanced, for running the game without real time."""
+    def __init__(self, start: float = 0.0) -> None:
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+class Simulation:
+    """
+    The game without its terminal: the player, the world and the asteroids.
+
+    Each subsystem runs as a handler on a fixed-timestep Scheduler. The game
+    loop feeds it key presses through move() and calls step() every time it
+    wakes; headless runs use a VirtualClock and run() with scripted moves
+    instead. With profile=True, the seconds spent in each subsystem are
+    added up in timings.
+    """
+    def __init__(self, player: Player, world: World, view_height: int, view_width: int,
+                 clock: Callable[[], float] = time.monotonic, rng: random.Random = random,
+                 profile: bool = False) -> None:
+        self.player = player
+        self.world = world
+        self.view_height = view_height
+        self.view_width = view_width
+        self.clock = clock
+        self.rng = rng
+        self.timings: Optional[Dict[str, float]] = {} if profile else None
+        self.scheduler = Scheduler(SIMULATION_TICK, clock=clock)
+        self.last_movement_time = self.scheduler.time  # Track when player last moved
+        self.hits = 0  # asteroids that hit the player since the last check
+        self._accumulated_movement = 0.0
+
+        # The asteroids start at the top of the area around the player
+        self.world.update(*self.visible_area())
+        self.asteroids = AsteroidField()
+        for _ in range(INITIAL_ASTEROIDS):
+            self.spawn_asteroid()
+
+        self._update_world = self._timed('world', self._update_world)
+        self._check_hits = self._timed('collisions', self._check_hits)
+        self.scheduler.every(SIMULATION_TICK, self._timed('asteroids', self._move_asteroids))
+        self.scheduler.every(1.0 / ASTEROID_FREQUENCY, self._timed('spawn', self._spawn_asteroids))
+        self.scheduler.every(SIMULATION_TICK, self._timed('moons', self._move_moons))
+        self.scheduler.every(FUEL_REGEN_INTERVAL, self._timed('fuel', self._regenerate_fuel))
+
+    def _timed(self, name: str, function: Callable) -> Callable:
+        """Wrap function to add its run time to timings[name] when profiling."""
+        timings = self.timings
+        if timings is None:
+            return function
+        timings[name] = 0.0
+
+        def timed(*args):
+            start = time.perf_counter()
+            result = function(*args)
+            timings[name] += time.perf_counter() - start
+            return result
+
+        return timed
+
+    def visible_area(self) -> Tuple[int, int, int, int]:
+        """Return the world rectangle (left, top, right, bottom) shown around the player."""
+        left, top = viewport(self.player, self.view_height, self.view_width)
+        return left, top, left + self.view_width, top + self.view_height
+
+    def spawn_asteroid(self) -> None:
+        """Add an asteroid at the top of the active area."""
+        world = self.world
+        self.asteroids.add(self.rng.randrange(world.left, world.right), world.top)
+
+    def move(self, direction: str) -> bool:
+        """
+        Move the player one cell, using fuel, unless a planet is in the way.
+
+        Args:
+            direction: 'up', 'down', 'left' or 'right'
+
+        Returns:
+            True if the player moved
+        """
+        player = self.player
+        if player.fuel <= 0:
+            return False
+        old_x = player.position["x"]
+        old_y = player.position["y"]
+        MOVES[direction](player)
+
+        # Check for collision with planets and revert if needed
+        if self.world.planet_index.collides(player.position["x"], player.position["y"]):
+            player.position["x"] = old_x
+            player.position["y"] = old_y
+            return False
+        self.last_movement_time = self.scheduler.time
+        return True
+
+    def step(self, ticks: Optional[int] = None) -> Optional[str]:
+        """
+        Advance the game and check whether it is over.
+
+        Args:
+            ticks: Ticks to run; by default every tick that is due by the clock
+
+        Returns:
+            OUT_OF_FUEL or DESTROYED if the game is over, otherwise None
+        """
+        self._update_world()
+
+        # Advance the simulation by every tick that is due
+        if ticks is None:
+            self.scheduler.run_pending()
+        else:
+            self.scheduler.run_ticks(ticks)
+
+        if self.player.fuel <= 0:
+            return OUT_OF_FUEL
+        return self._check_hits()
+
+    def run(self, ticks: int, script: Optional[Mapping[int, str]] = None) -> Optional[str]:
+        """
+        Run ticks ticks one at a time as fast as possible, on a VirtualClock.
+
+        Args:
+            ticks: Ticks to run
+            script: Moves to make before a tick, as {tick number: direction}
+
+        Returns:
+            OUT_OF_FUEL or DESTROYED if the game ended early, otherwise None
+
+        Raises:
+            TypeError: If the simulation was not created with a VirtualClock
+        """
+        if not isinstance(self.clock, VirtualClock):
+            raise TypeError("Simulation.run() needs a simulation created with clock=VirtualClock()")
+        script = script or {}
+        for _ in range(ticks):
+            direction = script.get(self.scheduler.ticks)
+            if direction:
+                self.move(direction)
+            self.clock.advance(self.scheduler.tick)
+            result = self.step(1)
+            if result:
+                return result
+        return None
+
+    def _update_world(self) -> None:
+        # Generate and activate the chunks around the view; asteroids only live in the active area
+        world = self.world
+        if world.update(*self.visible_area()):
+            self.asteroids.retain(world.left, world.top, world.right, world.bottom)
+
+    def _check_hits(self) -> Optional[str]:
+        # Check for collisions with asteroids, including any the player moved into
+        player = self.player
+        self.hits += self.asteroids.hit_player(player.position["x"], player.position["y"])
+        if self.hits:
+            player.health -= ASTEROID_DAMAGE * self.hits
+            self.hits = 0
+            if player.health <= 0:
+                return DESTROYED
+
+        # Remove invisible asteroids
+        self.asteroids.compact()
+        return None
+
+    # Tick handlers, called with the simulated seconds since their last run
+
+    def _move_asteroids(self, dt: float) -> None:
+        self._accumulated_movement += ASTEROID_SPEED * dt
+        # Move all asteroids down the whole accumulated distance at once
+        distance = int(self._accumulated_movement)
+        if distance:
+            player = self.player
+            self.hits += self.asteroids.move_down(distance, self.world.planet_index, self.world.bottom,
+                                                  player.position["x"], player.position["y"])
+            self._accumulated_movement -= distance
+
+    def _spawn_asteroids(self, dt: float) -> None:
+        self.spawn_asteroid()
+
+    def _move_moons(self, dt: float) -> None:
+        self.world.move_moons(dt)
+
+    def _regenerate_fuel(self, dt: float) -> None:
+        # Regenerate once the player has been still long enough
+        if self.scheduler.time - self.last_movement_time >= FUEL_REGEN_WAIT_TIME:
+            self.player.add_fuel(FUEL_REGEN_AMOUNT)
@@ -0,0 +1,159 @@
+# FILE: spatial_index.py
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+from planet import Planet
+
+# Row returned by sweep_many for columns with no planet on the swept path
+NO_COLLISION = np.iinfo(np.int32).max
+
+class SpatialGrid:
+    """
+    Uniform grid that buckets items by the cells their bounding box overlaps.
+
+    Lookups only visit the cells around the queried point or rectangle, so
+    they cost the same however many items the rest of the world holds.
+    """
+    def __init__(self, cell_size: int = 16) -> None:
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], List] = {}
+
+    def insert(self, item, left: int, top: int, right: int, bottom: int) -> None:
+        """Add an item covering the cells from (left, top) to (right, bottom), inclusive."""
+        size = self.cell_size
+        for cell_y in range(top // size, bottom // size + 1):
+            for cell_x in range(left // size, right // size + 1):
+                self._cells.setdefault((cell_x, cell_y), []).append(item)
+
+    def near(self, x: int, y: int) -> List:
+        """Return the items whose bounding box may contain the point (x, y)."""
+        return self._cells.get((x // self.cell_size, y // self.cell_size), [])
+
+    def query(self, left: int, top: int, right: int, bottom: int) -> List:
+        """Return each item whose bounding box may overlap left <= x < right, top <= y < bottom, once."""
+        size = self.cell_size
+        seen = set()
+        found = []
+        for cell_y in range(top // size, (bottom - 1) // size + 1):
+            for cell_x in range(left // size, (right - 1) // size + 1):
+                for item in self._cells.get((cell_x, cell_y), ()):
+                    if item not in seen:
+                        seen.add(item)
+                        found.append(item)
+        return found
+
+class PlanetIndex(SpatialGrid):
+    """
+    Spatial grid of planets, bucketed by the cells their disc overlaps.
+
+    A point query only tests the planets registered in that point's cell,
+    so a collision check costs the same whether the world has ten planets
+    or ten thousand.
+    """
+    def __init__(self, planets: Iterable[Planet] = (), cell_size: int = 16) -> None:
+        super().__init__(cell_size)
+        for planet in planets:
+            self.add(planet)
+
+    def add(self, planet: Planet) -> None:
+        """Add a planet to every cell its bounding box touches."""
+        self.insert(planet, planet.x - planet.size, planet.y - planet.size, planet.x + planet.size, planet.y + planet.size)
+
+    def collides(self, x: int, y: int) -> bool:
+        """Check if the point (x, y) lies inside any planet."""
+        for planet in self.near(x, y):
+            if planet.is_collision(x, y):
+                return True
+        return False
+
+    def sweep_many(self, xs: np.ndarray, ys: np.ndarray, distance: int) -> np.ndarray:
+        """
+        Find where points moving straight down first enter a planet.
+
+        Args:
+            xs: Columns of the moving points
+            ys: Rows the points start from
+            distance: Rows each point moves down
+
+        Returns:
+            For each point, the first row in (ys[i], ys[i] + distance] inside
+            a planet, or NO_COLLISION
+        """
+        result = np.full(len(xs), NO_COLLISION, dtype=np.int32)
+        for i, (x, y) in enumerate(zip(xs.tolist(), ys.tolist())):
+            for row in range(y + 1, y + distance + 1):
+                if self.collides(x, row):
+                    result[i] = row
+                    break
+        return result
+
+class PlanetBitmap:
+    """
+    Occupancy bitmap of a rectangle of the world, one byte per cell.
+
+    Planet discs are rasterized once when added, so a collision check is a
+    single array lookup. For swept checks every column also records the
+    next planet row at or below each row. Has the same interface as
+    PlanetIndex, in world coordinates. Points outside the rectangle never
+    collide.
+    """
+    def __init__(self, width: int, height: int, planets: Iterable[Planet] = (), left: int = 0, top: int = 0) -> None:
+        self.width = width
+        self.height = height
+        self.left = left
+        self.top = top
+        self.cells = bytearray(width * height)
+        # Shares memory with cells, so planets added later show up here too
+        self._grid = np.frombuffer(self.cells, dtype=np.uint8).reshape(height, width)
+        # _next_row[y, x] is the first planet row >= y in column x; the extra bottom row is all NO_COLLISION
+        self._next_row = np.full((height + 1, width), NO_COLLISION, dtype=np.int32)
+        for planet in planets:
+            self._fill(planet)
+        self._update_columns(0, width)
+
+    def add(self, planet: Planet) -> None:
+        """Mark the cells covered by a planet, clipped to the rectangle."""
+        self._fill(planet)
+        x = planet.x - self.left
+        self._update_columns(max(0, x - planet.size), min(self.width, x + planet.size + 1))
+
+    def _fill(self, planet: Planet) -> None:
+        size = planet.size
+        center_x = planet.x - self.left
+        center_y = planet.y - self.top
+        for y in range(max(0, center_y - size), min(self.height, center_y + size + 1)):
+            dy = center_y - y
+            # Half-width of the disc on this row, in whole cells
+            half = int((size * size - dy * dy) ** 0.5)
+            left = max(0, center_x - half)
+            right = min(self.width, center_x + half + 1)
+            if left < right:
+                row = y * self.width
+                self.cells[row + left:row + right] = b'\x01' * (right - left)
+
+    def _update_columns(self, left: int, right: int) -> None:
+        if left >= right:
+            return
+        rows = np.arange(self.height, dtype=np.int32)[:, None]
+        solid = np.where(self._grid[:, left:right] == 1, rows, NO_COLLISION)
+        # A running minimum from the bottom up gives the next planet row in each column
+        self._next_row[:self.height, left:right] = np.minimum.accumulate(solid[::-1], axis=0)[::-1]
+
+    def collides(self, x: int, y: int) -> bool:
+        """Check if the point (x, y) lies inside any planet."""
+        x -= self.left
+        y -= self.top
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.cells[y * self.width + x] == 1
+        return False
+
+    def sweep_many(self, xs: np.ndarray, ys: np.ndarray, distance: int) -> np.ndarray:
+        """Same as PlanetIndex.sweep_many, but one table lookup per point."""
+        xs = xs - self.left
+        ys = ys - self.top
+        start = np.clip(ys + 1, 0, self.height)
+        inside = (xs >= 0) & (xs < self.width)
+        result = np.full(len(xs), NO_COLLISION, dtype=np.int32)
+        first = self._next_row[start[inside], xs[inside]]
+        hit = first <= ys[inside] + distance
+        result[np.flatnonzero(inside)[hit]] = first[hit] + self.top
+        return result
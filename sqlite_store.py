@@ -0,0 +1,208 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+from repository import Repository
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS planets (
+    planet_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS players (
+    player_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    fuel INTEGER NOT NULL,
+    current_planet_id TEXT,
+    inventory TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+"""
+
+# Stay below SQLite's limit on bound parameters per statement
+MAX_QUERY_PARAMS = 500
+
+class SqliteStore(Repository):
+    """
+    Repository backed by a SQLite database in WAL mode.
+
+    Fuel and location are real columns, so a move is a single conditional
+    UPDATE and concurrent workers never overwrite each other's players.
+    An empty database is seeded from planets.json and players.json.
+    """
+    def __init__(self, data_dir: str = '.', filename: str = 'space_explorer.db') -> None:
+        self.data_dir = data_dir
+        self.path = os.path.join(data_dir, filename)
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+        self._seed(conn)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        if self._pid != os.getpid():
+            # Connections must not be shared with the parent of a forked worker
+            with self._lock:
+                self._local = threading.local()
+                self._connections = []
+                self._pid = os.getpid()
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=30.0, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _seed(self, conn: sqlite3.Connection) -> None:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if conn.execute('SELECT 1 FROM planets LIMIT 1').fetchone() is None:
+                conn.executemany(
+                    'INSERT INTO planets (planet_id, data) VALUES (?, ?)',
+                    ((p['planetId'], json.dumps(p)) for p in self._read_json('planets.json'))
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('planets_modified', ?)",
+                    (time.time(),)
+                )
+            if conn.execute('SELECT 1 FROM players LIMIT 1').fetchone() is None:
+                conn.executemany(
+                    'INSERT INTO players (player_id, name, fuel, current_planet_id, inventory) VALUES (?, ?, ?, ?, ?)',
+                    (self._player_row(p) for p in self._read_json('players.json'))
+                )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _read_json(self, filename: str) -> List[Dict]:
+        try:
+            with open(os.path.join(self.data_dir, filename), 'r') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return []
+
+    @staticmethod
+    def _player_row(player: Dict) -> tuple:
+        inventory = dict(player.get('inventory', {}))
+        fuel = inventory.pop('fuel', 0)
+        return player['playerId'], player['name'], fuel, player.get('currentPlanetId'), json.dumps(inventory)
+
+    @staticmethod
+    def _player_dict(row: tuple) -> Dict:
+        player_id, name, fuel, current_planet_id, inventory = row
+        return {
+            'playerId': player_id,
+            'name': name,
+            'inventory': {'fuel': fuel, **json.loads(inventory)},
+            'currentPlanetId': current_planet_id
+        }
+
+    def get_planet(self, planet_id: str) -> Optional[Dict]:
+        row = self._connection().execute('SELECT data FROM planets WHERE planet_id = ?', (planet_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def planets(self) -> List[Dict]:
+        rows = self._connection().execute('SELECT data FROM planets ORDER BY rowid')
+        return [json.loads(data) for data, in rows]
+
+    def get_planets(self, planet_ids: Sequence[str]) -> List[Dict]:
+        conn = self._connection()
+        found = {}
+        for start in range(0, len(planet_ids), MAX_QUERY_PARAMS):
+            chunk = planet_ids[start:start + MAX_QUERY_PARAMS]
+            rows = conn.execute(
+                f"SELECT planet_id, data FROM planets WHERE planet_id IN ({','.join('?' * len(chunk))})",
+                chunk
+            )
+            found.update(rows)
+        return [json.loads(found[planet_id]) for planet_id in planet_ids if planet_id in found]
+
+    def planet_page(self, offset: int, limit: int) -> Tuple[List[Dict], int]:
+        conn = self._connection()
+        rows = conn.execute('SELECT data FROM planets ORDER BY rowid LIMIT ? OFFSET ?', (limit, offset))
+        page = [json.loads(data) for data, in rows]
+        total, = conn.execute('SELECT COUNT(*) FROM planets').fetchone()
+        return page, total
+
+    def planets_modified(self) -> Optional[float]:
+        row = self._connection().execute("SELECT value FROM meta WHERE key = 'planets_modified'").fetchone()
+        return row[0] if row else None
+
+    def get_player(self, player_id: str) -> Optional[Dict]:
+        row = self._connection().execute(
+            'SELECT player_id, name, fuel, current_planet_id, inventory FROM players WHERE player_id = ?',
+            (player_id,)
+        ).fetchone()
+        return self._player_dict(row) if row else None
+
+    def players(self) -> List[Dict]:
+        rows = self._connection().execute(
+            'SELECT player_id, name, fuel, current_planet_id, inventory FROM players ORDER BY rowid'
+        )
+        return [self._player_dict(row) for row in rows]
+
+    def add_player(self, player: Dict) -> None:
+        self._connection().execute(
+            'INSERT INTO players (player_id, name, fuel, current_planet_id, inventory) VALUES (?, ?, ?, ?, ?)',
+            self._player_row(player)
+        )
+
+    def change_fuel(self, player_id: str, delta: int) -> None:
+        self._connection().execute('UPDATE players SET fuel = fuel + ? WHERE player_id = ?', (delta, player_id))
+
+    def move_player(self, player_id: str, planet_id: str, fuel_cost: int) -> Optional[Dict]:
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            result = self._move(conn, player_id, planet_id, fuel_cost)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return result
+
+    def move_players(self, moves: Sequence[Tuple[str, str]], fuel_cost: int) -> List[Optional[Dict]]:
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            results = [self._move(conn, player_id, planet_id, fuel_cost) for player_id, planet_id in moves]
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return results
+
+    def _move(self, conn: sqlite3.Connection, player_id: str, planet_id: str, fuel_cost: int) -> Optional[Dict]:
+        # Runs inside the caller's transaction. The fuel check is part of the
+        # UPDATE, so it can't race another move; the SELECT reads our own
+        # write, without needing UPDATE ... RETURNING from SQLite 3.35.
+        updated = conn.execute(
+            'UPDATE players SET fuel = fuel - ?, current_planet_id = ? WHERE player_id = ? AND fuel >= ?',
+            (fuel_cost, planet_id, player_id, fuel_cost)
+        ).rowcount
+        if not updated:
+            return None
+        row = conn.execute(
+            'SELECT player_id, name, fuel, current_planet_id, inventory FROM players WHERE player_id = ?',
+            (player_id,)
+        ).fetchone()
+        return self._player_dict(row)
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
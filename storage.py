@@ -0,0 +1,49 @@
+import os
+import threading
+from typing import Dict, Optional, Tuple
+from repository import Repository
+from sqlite_store import SqliteStore
+from world_store import WorldStore
+
+# planets.json and players.json live next to the code unless configured otherwise
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+BACKENDS = {
+    'json': WorldStore,
+    'sqlite': SqliteStore
+}
+
+_repositories: Dict[Tuple[str, str], Repository] = {}
+_repositories_lock = threading.Lock()
+
+def create_repository(backend: str = 'json', data_dir: str = DATA_DIR) -> Repository:
+    """Create a new storage backend with the given name ('json' or 'sqlite')."""
+    try:
+        backend_class = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown storage backend: {backend}")
+    return backend_class(data_dir)
+
+def get_repository(backend: Optional[str] = None, data_dir: Optional[str] = None) -> Repository:
+    """
+    Return the shared repository for a backend and data directory.
+
+    The repository is created on first use, so everything using the same
+    files (several apps, the game, preloaded server workers) shares one
+    warmed-up instance. Defaults come from the SPACE_EXPLORER_STORAGE and
+    SPACE_EXPLORER_DATA_DIR environment variables.
+    """
+    backend = backend or os.environ.get('SPACE_EXPLORER_STORAGE') or 'json'
+    data_dir = os.path.abspath(data_dir or os.environ.get('SPACE_EXPLORER_DATA_DIR') or DATA_DIR)
+    with _repositories_lock:
+        key = (backend, data_dir)
+        if key not in _repositories:
+            _repositories[key] = create_repository(backend, data_dir)
+        return _repositories[key]
+
+def close_repositories() -> None:
+    """Flush and close all shared repositories."""
+    with _repositories_lock:
+        for repository in _repositories.values():
+            repository.close()
+        _repositories.clear()
@@ -0,0 +1,172 @@
+import json
+import os
+import time
+from types import SimpleNamespace
+import pytest
+import world_store
+from journal import Journal, fuel_record, location_record
+from world_store import WorldStore
+
+START_FUEL = 100
+
+def write_players(data_dir, fuel=START_FUEL):
+    players = [{"playerId": "p1", "name": "Captain", "inventory": {"fuel": fuel}, "currentPlanetId": None}]
+    data = json.dumps(players)
+    with open(data_dir / 'players.json', 'w') as file:
+        file.write(data)
+    return data
+
+def snapshot_fuel(data_dir):
+    with open(data_dir / 'players.json') as file:
+        return json.load(file)[0]['inventory']['fuel']
+
+def stored_fuel(data_dir):
+    store = WorldStore(str(data_dir), compact_interval=3600)
+    try:
+        return store.get_player('p1')['inventory']['fuel']
+    finally:
+        store.close()
+
+def players_by_id(fuel=START_FUEL):
+    return {"p1": {"playerId": "p1", "inventory": {"fuel": fuel}, "currentPlanetId": None}}
+
+def test_records_are_replayed_on_the_snapshot_they_belong_to(tmp_path):
+    journal = Journal(str(tmp_path / 'players.journal'))
+    journal.reset('snap1')
+    journal.append([fuel_record('p1', -10), location_record('p1', 'planet1')])
+    journal.append([fuel_record('p1', -5)])
+
+    players = players_by_id()
+    assert Journal(journal.path).sync(players, 'snap1') == 3
+    assert players['p1']['inventory']['fuel'] == START_FUEL - 15
+    assert players['p1']['currentPlanetId'] == 'planet1'
+
+def test_store_replays_the_journal_of_another_instance(tmp_path):
+    write_players(tmp_path)
+    writer = WorldStore(str(tmp_path), compact_interval=3600)
+    writer.change_fuel('p1', -30)
+    writer.move_player('p1', 'planet1', 10)
+
+    # A second process starts before the first compacted the journal
+    reader = WorldStore(str(tmp_path), compact_interval=3600)
+    player = reader.get_player('p1')
+    assert player['inventory']['fuel'] == START_FUEL - 40
+    assert player['currentPlanetId'] == 'planet1'
+
+    writer.close()
+    reader.close()
+    with open(tmp_path / 'players.json') as file:
+        assert json.load(file)[0]['inventory']['fuel'] == START_FUEL - 40
+
+def test_records_for_a_stale_snapshot_are_skipped(tmp_path):
+    journal = Journal(str(tmp_path / 'players.journal'))
+    journal.reset('old')
+    journal.append([fuel_record('p1', -10)])
+
+    players = players_by_id()
+    assert Journal(journal.path).sync(players, 'new') == 0
+    assert players['p1']['inventory']['fuel'] == START_FUEL
+
+def test_crash_between_snapshot_and_journal_reset_applies_records_once(tmp_path):
+    data = write_players(tmp_path)
+    journal = Journal(str(tmp_path / 'players.journal'))
+    journal.reset(WorldStore._snapshot_hash(data))
+    journal.append([fuel_record('p1', -25)])
+    journal.close()
+
+    # Compaction wrote the new snapshot, then crashed before resetting the journal
+    write_players(tmp_path, START_FUEL - 25)
+
+    restarted = WorldStore(str(tmp_path), compact_interval=3600)
+    assert restarted.get_player('p1')['inventory']['fuel'] == START_FUEL - 25
+    # New records start a journal for the new snapshot
+    restarted.change_fuel('p1', -5)
+    assert WorldStore(str(tmp_path), compact_interval=3600).get_player('p1')['inventory']['fuel'] == START_FUEL - 30
+    restarted.close()
+
+def test_torn_lines_are_skipped_and_later_records_applied(tmp_path):
+    path = tmp_path / 'players.journal'
+    with open(path, 'w') as file:
+        file.write(json.dumps({'op': 'base', 'snapshot': 'snap1'}) + '\n')
+        file.write('{"op":"fuel","id":"p1"\n')  # torn write of a crashed process
+        file.write(json.dumps(fuel_record('p1', -10)) + '\n')
+        file.write('{"op":"fuel","id":"p1","d":-')  # still being written
+
+    journal = Journal(str(path))
+    players = players_by_id()
+    assert journal.sync(players, 'snap1') == 1
+    assert players['p1']['inventory']['fuel'] == START_FUEL - 10
+
+    # Our records start on a new line instead of continuing the torn one
+    journal.append([fuel_record('p1', -1)])
+    players = players_by_id()
+    assert Journal(str(path)).sync(players, 'snap1') == 2
+    assert players['p1']['inventory']['fuel'] == START_FUEL - 11
+
+def test_moves_during_compaction_are_kept(tmp_path, monkeypatch):
+    write_players(tmp_path)
+    store = WorldStore(str(tmp_path), compact_interval=3600)
+    other = WorldStore(str(tmp_path), compact_interval=3600)
+    store.change_fuel('p1', -10)
+
+    # Another process moves while the player is serialized, and again while the snapshot is written
+    def dumps(obj):
+        monkeypatch.setattr(world_store, 'json', json)
+        other.change_fuel('p1', -3)
+        return json.dumps(obj)
+
+    def write_temp(path, data):
+        monkeypatch.setattr(world_store, 'write_temp', real_write_temp)
+        other.change_fuel('p1', -4)
+        return real_write_temp(path, data)
+
+    real_write_temp = world_store.write_temp
+    monkeypatch.setattr(world_store, 'json', SimpleNamespace(dumps=dumps, loads=json.loads))
+    monkeypatch.setattr(world_store, 'write_temp', write_temp)
+    store.flush()
+
+    assert snapshot_fuel(tmp_path) == START_FUEL - 13
+    assert store.get_player('p1')['inventory']['fuel'] == START_FUEL - 17
+    assert stored_fuel(tmp_path) == START_FUEL - 17
+    other.close()
+    store.close()
+    assert snapshot_fuel(tmp_path) == START_FUEL - 17
+
+def test_failed_compaction_loses_no_records(tmp_path, monkeypatch):
+    write_players(tmp_path)
+    store = WorldStore(str(tmp_path), compact_interval=3600)
+    store.change_fuel('p1', -10)
+
+    real_replace = os.replace
+
+    def replace(src, dst):
+        if dst == store.players_file:
+            raise OSError("disk full")
+        real_replace(src, dst)
+
+    monkeypatch.setattr(os, 'replace', replace)
+    with pytest.raises(OSError):
+        store.flush()
+    monkeypatch.undo()
+    assert not list(tmp_path.glob('.players.json.*'))
+
+    # The journal now also holds the records for the snapshot that was never written
+    assert snapshot_fuel(tmp_path) == START_FUEL
+    assert stored_fuel(tmp_path) == START_FUEL - 10
+    store.change_fuel('p1', -5)
+    assert stored_fuel(tmp_path) == START_FUEL - 15
+    store.close()
+    assert snapshot_fuel(tmp_path) == START_FUEL - 15
+
+def test_compaction_starts_once_the_journal_is_large(tmp_path):
+    data = write_players(tmp_path)
+    store = WorldStore(str(tmp_path), compact_interval=3600, max_journal_bytes=len(data))
+    # Each record is well over a tenth of the snapshot
+    for _ in range(10):
+        store.change_fuel('p1', -1)
+
+    deadline = time.monotonic() + 10
+    while snapshot_fuel(tmp_path) == START_FUEL and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert snapshot_fuel(tmp_path) < START_FUEL
+    store.close()
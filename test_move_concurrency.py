@@ -0,0 +1,80 @@
+import json
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from main import create_app
+from storage import create_repository
+
+NUM_PLAYERS = 10
+START_FUEL = 1000
+FUEL_COST = 10
+MOVES_PER_PLAYER = 300  # More than the fuel allows; exactly 100 per player succeed
+EXPECTED_MOVES = NUM_PLAYERS * (START_FUEL // FUEL_COST)
+
+def write_world(data_dir):
+    players = [
+        {
+            "playerId": f"p{i}",
+            "name": f"Captain{i}",
+            "inventory": {"fuel": START_FUEL, "iron": 0, "gold": 0},
+            "currentPlanetId": None
+        }
+        for i in range(NUM_PLAYERS)
+    ]
+    planets = [{"planetId": f"planet{i}", "name": f"Planet {i}"} for i in range(2)]
+    with open(data_dir / 'players.json', 'w') as file:
+        json.dump(players, file)
+    with open(data_dir / 'planets.json', 'w') as file:
+        json.dump(planets, file)
+
+def all_moves():
+    return [(f"p{i}", f"planet{n % 2}") for n in range(MOVES_PER_PLAYER) for i in range(NUM_PLAYERS)]
+
+def assert_fuel_used_up(backend, data_dir):
+    repository = create_repository(backend, str(data_dir))
+    try:
+        assert [p['inventory']['fuel'] for p in repository.players()] == [0] * NUM_PLAYERS
+    finally:
+        repository.close()
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite'])
+def test_threaded_moves_account_fuel_exactly(tmp_path, backend):
+    write_world(tmp_path)
+    app = create_app({'DATA_DIR': str(tmp_path), 'STORAGE_BACKEND': backend})
+
+    def move(item):
+        player_id, planet_id = item
+        response = app.test_client().post('/move', json={
+            "player_id": player_id,
+            "destination_planet_id": planet_id
+        })
+        assert response.status_code in (200, 400)
+        return response.status_code == 200
+
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        succeeded = sum(pool.map(move, all_moves()))
+    app.extensions['repository'].close()
+
+    assert succeeded == EXPECTED_MOVES
+    assert_fuel_used_up(backend, tmp_path)
+
+def _move_in_process(args):
+    backend, data_dir, moves = args
+    repository = create_repository(backend, data_dir)
+    try:
+        return sum(1 for player_id, planet_id in moves if repository.move_player(player_id, planet_id, FUEL_COST))
+    finally:
+        repository.close()
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite'])
+def test_multi_process_moves_account_fuel_exactly(tmp_path, backend):
+    write_world(tmp_path)
+    moves = all_moves()
+    workers = 4
+    chunks = [(backend, str(tmp_path), moves[i::workers]) for i in range(workers)]
+
+    with multiprocessing.get_context('spawn').Pool(workers) as pool:
+        succeeded = sum(pool.map(_move_in_process, chunks))
+
+    assert succeeded == EXPECTED_MOVES
+    assert_fuel_used_up(backend, tmp_path)
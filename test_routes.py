@@ -0,0 +1,154 @@
+import asyncio
+import json
+import pytest
+import api
+import asgi
+from main import create_app
+from storage import close_repositories
+
+START_FUEL = 100
+LOW_FUEL = 15  # enough for one move
+NUM_PLANETS = 5
+
+@pytest.fixture(params=['json', 'sqlite'])
+def config(tmp_path, request):
+    players = [
+        {"playerId": f"p{i}", "name": f"Captain{i}", "inventory": {"fuel": fuel}, "currentPlanetId": None}
+        for i, fuel in enumerate([START_FUEL, LOW_FUEL])
+    ]
+    planets = [{"planetId": f"planet{i}", "name": f"Planet {i}"} for i in range(NUM_PLANETS)]
+    with open(tmp_path / 'players.json', 'w') as file:
+        json.dump(players, file)
+    with open(tmp_path / 'planets.json', 'w') as file:
+        json.dump(planets, file)
+    yield {'DATA_DIR': str(tmp_path), 'STORAGE_BACKEND': request.param}
+    close_repositories()
+
+def call_asgi(app, method, path, query='', body=None, headers=()):
+    """Send one request to the ASGI app; return the status, headers and body."""
+    scope = {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': query.encode(),
+        'headers': [(name.lower().encode(), value.encode()) for name, value in headers]
+    }
+    messages = []
+
+    async def receive():
+        data = json.dumps(body).encode() if body is not None else b''
+        return {'type': 'http.request', 'body': data, 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start, response = messages
+    return start['status'], dict(start['headers']), response['body']
+
+def test_malformed_moves_are_rejected(config):
+    client = create_app(config).test_client()
+    app = asgi.create_app(config)
+    bad = [
+        [1],
+        "p0",
+        {"player_id": ["p0"], "destination_planet_id": "planet1"},
+        {"player_id": "p0", "destination_planet_id": {"planetId": "planet1"}},
+        {"player_id": 0, "destination_planet_id": "planet1"},
+        {"destination_planet_id": "planet1"}
+    ]
+    try:
+        for body in bad:
+            assert client.post('/move', json=body).status_code == 400
+            assert call_asgi(app, 'POST', '/move', body=body)[0] == 400
+        player = client.post('/move', json={"player_id": "p0", "destination_planet_id": "planet1"}).get_json()['player']
+        assert player['inventory']['fuel'] == START_FUEL - 10
+    finally:
+        app.close()
+
+def test_planets_by_id(config):
+    client = create_app(config).test_client()
+    body = client.get('/planets?ids=planet3,unknown,planet1').get_json()
+    assert [planet['planetId'] for planet in body['planets']] == ['planet3', 'planet1']
+    assert body['missing'] == ['unknown']
+    assert client.get('/planets?ids=').get_json() == {"planets": [], "missing": []}
+
+    too_many = ','.join(f"planet{i}" for i in range(api.MAX_PLANETS_PER_REQUEST + 1))
+    assert client.get(f'/planets?ids={too_many}').status_code == 400
+
+def test_planet_pages(config):
+    client = create_app(config).test_client()
+    seen = []
+    for page in range(1, 5):
+        body = client.get(f'/planets?page={page}&per_page=2').get_json()
+        assert (body['page'], body['per_page'], body['total']) == (page, 2, NUM_PLANETS)
+        seen += [planet['planetId'] for planet in body['planets']]
+    assert seen == [f"planet{i}" for i in range(NUM_PLANETS)]
+    assert len(client.get('/planets').get_json()['planets']) == min(NUM_PLANETS, api.DEFAULT_PAGE_SIZE)
+
+    for query in ('page=0', 'per_page=0', f'per_page={api.MAX_PLANETS_PER_REQUEST + 1}'):
+        assert client.get(f'/planets?{query}').status_code == 400
+
+def test_move_batch(config):
+    app = create_app(config)
+    client = app.test_client()
+    moves = [
+        {"player_id": "p0", "destination_planet_id": "planet1"},
+        {"player_id": "p1", "destination_planet_id": "planet1"},
+        {"player_id": ["p0"], "destination_planet_id": "planet1"},
+        {"player_id": "p0", "destination_planet_id": "unknown"},
+        {"player_id": "p0", "destination_planet_id": "planet2"},
+        {"player_id": "p1", "destination_planet_id": "planet2"},
+        "p0"
+    ]
+    response = client.post('/move/batch', json={"moves": moves})
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [result['status'] for result in results] == [200, 200, 400, 404, 200, 400, 400]
+
+    # Moves of the same player are charged one after the other, in order
+    assert results[0]['player']['inventory']['fuel'] == START_FUEL - api.MOVE_FUEL_COST
+    assert results[4]['player']['inventory']['fuel'] == START_FUEL - 2 * api.MOVE_FUEL_COST
+    assert results[4]['player']['currentPlanetId'] == 'planet2'
+    assert results[5]['error'] == api.NOT_ENOUGH_FUEL['error']
+    repository = app.extensions['repository']
+    assert repository.get_player('p0')['inventory']['fuel'] == START_FUEL - 2 * api.MOVE_FUEL_COST
+    assert repository.get_player('p1')['inventory']['fuel'] == LOW_FUEL - api.MOVE_FUEL_COST
+    assert repository.get_player('p1')['currentPlanetId'] == 'planet1'
+
+def test_move_batch_rejects_malformed_batches(config):
+    app = create_app(config)
+    client = app.test_client()
+    move = {"player_id": "p0", "destination_planet_id": "planet1"}
+    for body in ([move], {"moves": move}, {"moves": [move] * (api.MAX_BATCH_MOVES + 1)}):
+        assert client.post('/move/batch', json=body).status_code == 400
+    assert app.extensions['repository'].get_player('p0')['inventory']['fuel'] == START_FUEL
+
+@pytest.mark.parametrize('url', ['/planet?planetId=planet1', '/planets?ids=planet1,planet2', '/planets?page=2&per_page=2'])
+def test_planet_responses_can_be_cached(config, url):
+    client = create_app(config).test_client()
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == f"public, max-age={api.PLANET_CACHE_MAX_AGE}"
+    etag = response.headers['ETag']
+    last_modified = response.headers['Last-Modified']
+
+    not_modified = client.get(url, headers={'If-None-Match': etag})
+    assert (not_modified.status_code, not_modified.data) == (304, b'')
+    assert client.get(url, headers={'If-None-Match': '"other"'}).status_code == 200
+    assert client.get(url, headers={'If-Modified-Since': last_modified}).status_code == 304
+
+    # The ASGI app sends the same bytes and headers, so the ETags match
+    app = asgi.create_app(config)
+    try:
+        path, query = url.split('?')
+        status, headers, body = call_asgi(app, 'GET', path, query)
+        assert (status, body) == (200, response.data)
+        assert headers[b'etag'].decode() == etag
+        assert headers[b'last-modified'].decode() == last_modified
+        assert headers[b'cache-control'].decode() == response.headers['Cache-Control']
+        status, _, body = call_asgi(app, 'GET', path, query, headers=[('If-None-Match', etag)])
+        assert (status, body) == (304, b'')
+        assert call_asgi(app, 'GET', path, query, headers=[('If-Modified-Since', last_modified)])[0] == 304
+    finally:
+        app.close()
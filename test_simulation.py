@@ -0,0 +1,58 @@
+import random
+import time
+import pytest
+from player import Player
+from simulation import ASTEROID_DAMAGE, DESTROYED, MOVES, OUT_OF_FUEL, Simulation, VirtualClock
+from world import World
+
+SEED = 7
+TICKS = 1500
+
+def make_simulation(seed=SEED):
+    return Simulation(Player("Captain"), World(seed), 40, 120, clock=VirtualClock(), rng=random.Random(seed))
+
+def make_script(seed=SEED):
+    rng = random.Random(seed)
+    return {tick: rng.choice(list(MOVES)) for tick in range(0, TICKS, 5)}
+
+def outcome(simulation, result):
+    asteroids = simulation.asteroids
+    n = asteroids.count
+    moons = simulation.world.moons
+    return (
+        result,
+        dict(simulation.player.position),
+        simulation.player.fuel,
+        simulation.player.health,
+        simulation.scheduler.ticks,
+        sorted(zip(asteroids.x[:n].tolist(), asteroids.y[:n].tolist())),
+        moons.angle[:moons.count].tolist()
+    )
+
+def test_seeded_headless_runs_end_the_same():
+    first = make_simulation()
+    first_result = first.run(TICKS, make_script())
+    second = make_simulation()
+    second_result = second.run(TICKS, make_script())
+
+    assert outcome(second, second_result) == outcome(first, first_result)
+    assert first_result is None and first.scheduler.ticks == TICKS
+    assert first.player.position != {"x": 0, "y": 0}
+
+def test_game_ends_out_of_fuel():
+    simulation = make_simulation()
+    simulation.player.fuel = 1
+    assert simulation.run(10, {0: 'right'}) == OUT_OF_FUEL
+    assert simulation.scheduler.ticks == 1
+
+def test_game_ends_when_an_asteroid_destroys_the_player():
+    simulation = make_simulation()
+    simulation.player.health = ASTEROID_DAMAGE
+    # An asteroid right above the player falls on it
+    simulation.asteroids.add(0, -1)
+    assert simulation.run(100) == DESTROYED
+
+def test_run_needs_a_virtual_clock():
+    simulation = Simulation(Player("Captain"), World(SEED), 40, 120, clock=time.monotonic)
+    with pytest.raises(TypeError):
+        simulation.run(1)
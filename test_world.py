@@ -0,0 +1,81 @@
+from world import MAX_CHUNKS, World
+
+SEED = 42
+PLANET_DATA = [
+    {"planetId": "planet123", "name": "Stored", "position": {"x": 10, "y": 10}, "size": 2},
+    {"name": "Unplaced"}
+]
+
+def chunk_state(chunk):
+    moons = chunk.moons
+    n = moons.count
+    return (
+        [(planet.planet_id, planet.x, planet.y, planet.size, planet.sprite) for planet in chunk.planets],
+        [moons.x[:n].tolist(), moons.y[:n].tolist(), moons.angle[:n].tolist(), moons.speed[:n].tolist()]
+    )
+
+def visit(world, views):
+    for x, y in views:
+        world.update(x, y, x + 120, y + 40)
+        world.move_moons(0.5)
+
+def test_chunks_depend_only_on_seed_and_position():
+    world = World(SEED, PLANET_DATA)
+    first = chunk_state(world.chunk(3, -2))
+
+    # Evict the chunk, then generate it again in a world that saw other chunks first
+    for i in range(MAX_CHUNKS):
+        world.chunk(100 + i, 0)
+    assert (3, -2) not in world._chunks
+    assert chunk_state(world.chunk(3, -2)) == first
+
+    other = World(SEED, PLANET_DATA)
+    other.chunk(0, 0)
+    assert chunk_state(other.chunk(3, -2)) == first
+    assert chunk_state(World(SEED + 1, PLANET_DATA).chunk(3, -2)) != first
+
+def test_stored_planets_keep_their_ids_and_places():
+    world = World(SEED, PLANET_DATA)
+    planets = {planet.planet_id: planet for chunk in world.chunks_in(0, 0, 300, 300) for planet in chunk.planets}
+    assert (planets["planet123"].x, planets["planet123"].y) == (10, 10)
+    # Planets from storage without an ID or position get stable ones from the seed
+    unplaced = planets["planet_home_1"]
+    again = World(SEED, PLANET_DATA).chunk(unplaced.x // 64, unplaced.y // 64)
+    assert "planet_home_1" in [planet.planet_id for planet in again.planets]
+
+def test_saved_world_loads_back_identical(tmp_path):
+    path = str(tmp_path / 'world.cache')
+    world = World(SEED, PLANET_DATA)
+    visit(world, [(0, 0), (200, 50), (-300, -100)])
+    world.save(path)
+
+    loaded = World(SEED, PLANET_DATA)
+    assert loaded.load(path)
+    assert list(loaded._chunks) == list(world._chunks)
+    for key, chunk in world._chunks.items():
+        assert chunk_state(loaded._chunks[key]) == chunk_state(chunk)
+
+    # Both continue the same way from there
+    visit(world, [(-300, -100), (0, 0)])
+    visit(loaded, [(-300, -100), (0, 0)])
+    assert [chunk_state(chunk) for chunk in loaded.active_chunks] == [chunk_state(chunk) for chunk in world.active_chunks]
+    assert loaded.moons.angle[:loaded.moons.count].tolist() == world.moons.angle[:world.moons.count].tolist()
+
+def test_snapshot_of_another_world_is_ignored(tmp_path):
+    path = str(tmp_path / 'world.cache')
+    world = World(SEED, PLANET_DATA)
+    visit(world, [(0, 0)])
+    world.save(path)
+
+    for other in (World(SEED + 1, PLANET_DATA), World(SEED, PLANET_DATA[:1])):
+        assert not other.load(path)
+        assert not other._chunks
+
+    with open(path, 'rb') as file:
+        data = file.read()
+    with open(path, 'wb') as file:
+        file.write(data[:len(data) // 2])
+    damaged = World(SEED, PLANET_DATA)
+    assert not damaged.load(path)
+    assert not damaged.load(str(tmp_path / 'missing.cache'))
+    assert not damaged._chunks
@@ -0,0 +1,223 @@
+# FILE: world.py
+import hashlib
+import json
+import random
+import struct
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+from moon import MoonSystem
+from persistence import atomic_write
+from planet import Planet
+from spatial_index import PlanetBitmap, PlanetIndex
+
+CHUNK_SIZE = 64  # world cells along each side of a chunk
+PLANETS_PER_CHUNK = 0.5  # average generated planets per chunk, about the old 10 per 300x300
+MAX_PLANET_SIZE = 3
+NUM_MOONS_PER_PLANET = 1
+MOON_ORBIT_RADIUS = 5
+HOME_SIZE = 300  # stored planets without a position are placed in [0, HOME_SIZE) on both axes
+ACTIVE_MARGIN = 1  # chunks around the viewport that are kept simulated
+MAX_CHUNKS = 256  # chunks kept in memory before the least recently used are evicted
+
+# Binary snapshot layout, little endian: a header, then per chunk its record
+# followed by its generated planets and its moons
+SNAPSHOT_MAGIC = b'SEW1'
+_HEADER = struct.Struct('<4s20sI')  # magic, world key, chunk count
+_CHUNK = struct.Struct('<iiHH')  # chunk x, chunk y, generated planets, moons
+_PLANET = struct.Struct('<iiB')  # x, y, size
+_MOON = struct.Struct('<iiidd')  # planet x, planet y, orbit radius, angle, speed
+
+class Chunk:
+    """The planets and moons in one CHUNK_SIZE x CHUNK_SIZE square of the world."""
+    def __init__(self, chunk_x: int, chunk_y: int, planets: List[Planet], moons: MoonSystem) -> None:
+        self.chunk_x = chunk_x
+        self.chunk_y = chunk_y
+        self.planets = planets
+        self.moons = moons
+
+class World:
+    """
+    Endless world generated lazily, one chunk at a time.
+
+    A chunk is generated from the world seed and its own coordinates only,
+    so a chunk that was evicted comes back identical. The chunks around the
+    viewport form the active area: only there are planet collisions indexed,
+    moons moved and asteroids simulated. Beyond MAX_CHUNKS, the least
+    recently used chunks are dropped.
+
+    The moons of the active area are merged into one MoonSystem, moons, so
+    they move in a single step; they are copied back to their chunks when
+    the area moves.
+
+    The chunks in memory can be saved to a binary snapshot and loaded back
+    by a world with the same seed and planet data.
+    """
+    def __init__(self, seed: int, planet_data: Iterable[Dict] = (), use_bitmap: bool = True) -> None:
+        planet_data = list(planet_data)
+        self.seed = seed
+        self.use_bitmap = use_bitmap
+        self._chunks: 'OrderedDict[Tuple[int, int], Chunk]' = OrderedDict()
+        # Identifies everything generation depends on, so a snapshot is only loaded into the same world
+        self.key = hashlib.sha1(f"{seed}:{json.dumps(planet_data, sort_keys=True)}".encode('utf-8')).digest()
+
+        # Planets from storage keep their place; those without one get a seeded spot near the origin
+        self._stored_planets: Dict[Tuple[int, int], List[Planet]] = {}
+        rng = random.Random(f"{seed}:home")
+        for i, data in enumerate(planet_data):
+            x = data.get('position', {}).get('x', rng.randrange(HOME_SIZE))
+            y = data.get('position', {}).get('y', rng.randrange(HOME_SIZE))
+            size = data.get('size', rng.randint(1, MAX_PLANET_SIZE))
+            if 'planetId' not in data:
+                # Numbered by their place in the planet data, which is part of the key
+                data = {**data, 'planetId': f"planet_home_{i}"}
+            planet = Planet(x, y, size, data)
+            self._stored_planets.setdefault((x // CHUNK_SIZE, y // CHUNK_SIZE), []).append(planet)
+
+        self.area = None  # active chunk range (left, top, right, bottom), right and bottom exclusive
+        self.active_chunks: List[Chunk] = []
+        self.planet_index = None
+        self.moons = MoonSystem()
+        # Active area in world cells
+        self.left = self.top = self.right = self.bottom = 0
+
+    def chunk(self, chunk_x: int, chunk_y: int) -> Chunk:
+        """Return a chunk, generating it if needed, and mark it as recently used."""
+        key = (chunk_x, chunk_y)
+        chunk = self._chunks.get(key)
+        if chunk is None:
+            chunk = self._chunks[key] = self._generate(chunk_x, chunk_y)
+            if len(self._chunks) > MAX_CHUNKS:
+                self._chunks.popitem(last=False)
+        else:
+            self._chunks.move_to_end(key)
+        return chunk
+
+    def _generate(self, chunk_x: int, chunk_y: int) -> Chunk:
+        rng = random.Random(f"{self.seed}:{chunk_x}:{chunk_y}")
+        planets = list(self._stored_planets.get((chunk_x, chunk_y), []))
+        count = int(PLANETS_PER_CHUNK) + (rng.random() < PLANETS_PER_CHUNK % 1)
+        for i in range(count):
+            size = rng.randint(1, MAX_PLANET_SIZE)
+            # Generated discs stay inside their chunk, so collisions never depend on a neighbour
+            x = chunk_x * CHUNK_SIZE + rng.randint(size, CHUNK_SIZE - 1 - size)
+            y = chunk_y * CHUNK_SIZE + rng.randint(size, CHUNK_SIZE - 1 - size)
+            planets.append(Planet(x, y, size, {'planetId': f"planet_{chunk_x}_{chunk_y}_{i}"}))
+
+        moons = MoonSystem()
+        for planet in planets:
+            for _ in range(rng.randint(0, NUM_MOONS_PER_PLANET)):
+                moons.add(planet.x, planet.y, rng.randint(3, MOON_ORBIT_RADIUS), rng)
+        return Chunk(chunk_x, chunk_y, planets, moons)
+
+    def chunks_in(self, left: int, top: int, right: int, bottom: int) -> List[Chunk]:
+        """Return the chunks overlapping left <= x < right, top <= y < bottom."""
+        return [
+            self.chunk(chunk_x, chunk_y)
+            for chunk_y in range(top // CHUNK_SIZE, (bottom - 1) // CHUNK_SIZE + 1)
+            for chunk_x in range(left // CHUNK_SIZE, (right - 1) // CHUNK_SIZE + 1)
+        ]
+
+    def update(self, left: int, top: int, right: int, bottom: int) -> bool:
+        """
+        Make the chunks around a viewport the active area.
+
+        Args:
+            left, top, right, bottom: Viewport in world cells, right and bottom exclusive
+
+        Returns:
+            True if the active area changed
+        """
+        area = (
+            left // CHUNK_SIZE - ACTIVE_MARGIN,
+            top // CHUNK_SIZE - ACTIVE_MARGIN,
+            (right - 1) // CHUNK_SIZE + ACTIVE_MARGIN + 1,
+            (bottom - 1) // CHUNK_SIZE + ACTIVE_MARGIN + 1
+        )
+        if area == self.area:
+            return False
+        self._store_moons()
+        self.area = area
+        self.left, self.top, self.right, self.bottom = (edge * CHUNK_SIZE for edge in area)
+        self.active_chunks = self.chunks_in(self.left, self.top, self.right, self.bottom)
+        # A single array operation per tick instead of one per chunk
+        self.moons = MoonSystem.merge([chunk.moons for chunk in self.active_chunks])
+
+        # Collisions are indexed for the active area only, and rebuilt when it moves
+        planets = [planet for chunk in self.active_chunks for planet in chunk.planets]
+        if self.use_bitmap:
+            self.planet_index = PlanetBitmap(self.right - self.left, self.bottom - self.top, planets, self.left, self.top)
+        else:
+            self.planet_index = PlanetIndex(planets)
+        return True
+
+    def move_moons(self, dt: float) -> None:
+        """Move the moons in the active area along their orbits for dt seconds."""
+        self.moons.move(dt)
+
+    def _store_moons(self) -> None:
+        """Copy the orbit positions of the active moons back to their chunks."""
+        start = 0
+        for chunk in self.active_chunks:
+            chunk.moons.update_from(self.moons, start)
+            start += len(chunk.moons)
+
+    def save(self, path: str) -> None:
+        """Write the chunks in memory to a binary snapshot, least recently used first."""
+        self._store_moons()
+        parts = [_HEADER.pack(SNAPSHOT_MAGIC, self.key, len(self._chunks))]
+        for key, chunk in self._chunks.items():
+            # Planets from storage are placed again from the planet data, which is part of the key
+            generated = chunk.planets[len(self._stored_planets.get(key, ())):]
+            moons = chunk.moons
+            parts.append(_CHUNK.pack(chunk.chunk_x, chunk.chunk_y, len(generated), len(moons)))
+            parts.extend(_PLANET.pack(planet.x, planet.y, planet.size) for planet in generated)
+            parts.extend(
+                _MOON.pack(*moon)
+                for moon in zip(
+                    moons.planet_x[:moons.count].tolist(), moons.planet_y[:moons.count].tolist(),
+                    moons.orbit_radius[:moons.count].tolist(), moons.angle[:moons.count].tolist(),
+                    moons.speed[:moons.count].tolist()
+                )
+            )
+        atomic_write(path, b''.join(parts))
+
+    def load(self, path: str) -> bool:
+        """
+        Load the chunks saved by save() instead of generating them again.
+
+        Args:
+            path: Snapshot file
+
+        Returns:
+            False, leaving the world unchanged, if the file is missing, damaged
+            or was saved by a world with another seed or planet data
+        """
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+            magic, key, count = _HEADER.unpack_from(data)
+            if magic != SNAPSHOT_MAGIC or key != self.key:
+                return False
+            chunks = OrderedDict()
+            offset = _HEADER.size
+            for _ in range(count):
+                chunk_x, chunk_y, num_planets, num_moons = _CHUNK.unpack_from(data, offset)
+                offset += _CHUNK.size
+                planets = list(self._stored_planets.get((chunk_x, chunk_y), []))
+                for i in range(num_planets):
+                    x, y, size = _PLANET.unpack_from(data, offset)
+                    offset += _PLANET.size
+                    planets.append(Planet(x, y, size, {'planetId': f"planet_{chunk_x}_{chunk_y}_{i}"}))
+                moons = MoonSystem(max(num_moons, 1))
+                for _ in range(num_moons):
+                    moons.add_orbit(*_MOON.unpack_from(data, offset))
+                    offset += _MOON.size
+                chunks[(chunk_x, chunk_y)] = Chunk(chunk_x, chunk_y, planets, moons)
+        except (OSError, struct.error):
+            return False
+        self._chunks = chunks
+        # The active area is rebuilt from the loaded chunks on the next update
+        self.area = None
+        self.active_chunks = []
+        self.moons = MoonSystem()
+        return True
@@ -0,0 +1,229 @@
+import copy
+import hashlib
+import itertools
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+from journal import (Journal, apply_record, base_record, fuel_record, location_record, new_player_record,
+                     record_player_id)
+from persistence import WriteBehindWriter, remove_temp, write_temp
+from repository import Repository
+
+COMPACTION_BATCH = 256  # players serialized per hold of the lock while compacting
+
+class WorldStore(Repository):
+    """
+    JSON repository keeping planets.json and players.json in memory by ID.
+
+    The files are parsed once and only re-read when their modification time
+    changes, so lookups by planetId/playerId are plain dict accesses.
+    Player mutations are appended to players.journal; a background
+    compaction folds the journal into a new players.json snapshot once
+    the journal outgrows max_journal_bytes or the snapshot itself, so
+    compaction work per move doesn't grow with the number of players.
+
+    Mutations run under the journal's file lock after catching up with
+    records other processes appended, so several threads and worker
+    processes can share the same files without losing updates.
+    """
+    def __init__(self, data_dir: str = '.', compact_interval: float = 5.0, max_journal_bytes: int = 1024 * 1024) -> None:
+        self.planets_file = os.path.join(data_dir, 'planets.json')
+        self.players_file = os.path.join(data_dir, 'players.json')
+        self.journal = Journal(os.path.join(data_dir, 'players.journal'))
+        self._planets: Dict[str, Dict] = {}
+        self._players: Dict[str, Dict] = {}
+        self._planets_stamp = None
+        self._players_stamp = None
+        self._snapshot_id = None
+        self._lock = threading.RLock()
+        self.max_journal_bytes = max_journal_bytes
+        self._writer = WriteBehindWriter(self._compact, compact_interval, max_journal_bytes)
+        self.refresh()
+
+    @staticmethod
+    def _stamp(path: str):
+        """Return a (mtime, size) pair identifying the file's current version."""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _read(path: str) -> str:
+        try:
+            with open(path, 'r') as file:
+                return file.read()
+        except FileNotFoundError:
+            return '[]'
+
+    @staticmethod
+    def _snapshot_hash(data: str) -> str:
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+    def refresh(self) -> None:
+        """Reload files whose mtime changed and apply new journal records."""
+        with self._lock:
+            stamp = self._stamp(self.planets_file)
+            if stamp != self._planets_stamp:
+                self._planets = {p['planetId']: p for p in json.loads(self._read(self.planets_file))}
+                self._planets_stamp = stamp
+
+            stamp = self._stamp(self.players_file)
+            # A replaced journal can repeat records that were already applied
+            if stamp != self._players_stamp or self.journal.replaced():
+                data = self._read(self.players_file)
+                self._players = {p['playerId']: p for p in json.loads(data)}
+                self._snapshot_id = self._snapshot_hash(data)
+                self._set_snapshot_stamp(stamp)
+                self.journal.sync(self._players, self._snapshot_id, restart=True)
+            else:
+                self.journal.sync(self._players, self._snapshot_id)
+
+    def get_planet(self, planet_id: str) -> Optional[Dict]:
+        self.refresh()
+        return self._planets.get(planet_id)
+
+    def planets(self) -> List[Dict]:
+        self.refresh()
+        return list(self._planets.values())
+
+    def get_planets(self, planet_ids: Sequence[str]) -> List[Dict]:
+        self.refresh()
+        planets = (self._planets.get(planet_id) for planet_id in planet_ids)
+        return [planet for planet in planets if planet]
+
+    def planet_page(self, offset: int, limit: int) -> Tuple[List[Dict], int]:
+        self.refresh()
+        page = list(itertools.islice(self._planets.values(), offset, offset + limit))
+        return page, len(self._planets)
+
+    def planets_modified(self) -> Optional[float]:
+        self.refresh()
+        return self._planets_stamp[0] / 1e9 if self._planets_stamp else None
+
+    def get_player(self, player_id: str) -> Optional[Dict]:
+        self.refresh()
+        return self._players.get(player_id)
+
+    def players(self) -> List[Dict]:
+        self.refresh()
+        return list(self._players.values())
+
+    def add_player(self, player: Dict) -> None:
+        self._record([new_player_record(player)])
+
+    def change_fuel(self, player_id: str, delta: int) -> None:
+        self._record([fuel_record(player_id, delta)])
+
+    def move_player(self, player_id: str, planet_id: str, fuel_cost: int) -> Optional[Dict]:
+        with self.journal.lock, self._lock:
+            # Checked after catching up with other processes, so it can't go stale
+            self.refresh()
+            player = self._players.get(player_id)
+            if player is None or player['inventory']['fuel'] < fuel_cost:
+                return None
+            # Fuel and location go into the journal with a single write
+            self._record([fuel_record(player_id, -fuel_cost), location_record(player_id, planet_id)])
+            return copy.deepcopy(player)
+
+    def move_players(self, moves: Sequence[Tuple[str, str]], fuel_cost: int) -> List[Optional[Dict]]:
+        results = []
+        records = []
+        with self.journal.lock, self._lock:
+            self.refresh()
+            for player_id, planet_id in moves:
+                player = self._players.get(player_id)
+                if player is None or player['inventory']['fuel'] < fuel_cost:
+                    results.append(None)
+                    continue
+                # Applied right away so later moves of the same player see it
+                move = [fuel_record(player_id, -fuel_cost), location_record(player_id, planet_id)]
+                for record in move:
+                    apply_record(self._players, record)
+                records.extend(move)
+                results.append(copy.deepcopy(player))
+            if records:
+                self._append(records)
+        return results
+
+    def _record(self, records: List[Dict]) -> None:
+        with self.journal.lock, self._lock:
+            self.refresh()
+            self._append(records)
+            for record in records:
+                apply_record(self._players, record)
+
+    def _append(self, records: List[Dict]) -> None:
+        # Caller holds both locks and has refreshed
+        if self.journal.base() != self._snapshot_id:
+            # The journal so far belongs to another snapshot; ours follow a new base line
+            records = [base_record(self._snapshot_id)] + records
+        self._writer.add(self.journal.append(records))
+
+    def _set_snapshot_stamp(self, stamp) -> None:
+        self._players_stamp = stamp
+        # Compacting once the journal is as large as the snapshot keeps its cost per move constant
+        self._writer.max_pending = max(self.max_journal_bytes, stamp[1] if stamp else 0)
+
+    def flush(self) -> None:
+        """Compact the journal into players.json now."""
+        self._writer.flush()
+
+    def close(self) -> None:
+        """Stop background compaction and compact once more."""
+        self._writer.close()
+        self.journal.close()
+
+    def _compact(self) -> None:
+        # The snapshot is serialized and written without holding the locks
+        # for long, so moves go on meanwhile: players are serialized a batch
+        # at a time, those changed in the meantime again at the end, and
+        # records appended while writing carry over into the new journal.
+        with self.journal.lock, self._lock:
+            self.refresh()
+            snapshot_id = self._snapshot_id
+            inode, start = self.journal.position()
+            if inode is None:
+                return  # Nothing journaled yet
+            player_ids = list(self._players)
+
+        players = {}
+        for i in range(0, len(player_ids), COMPACTION_BATCH):
+            with self._lock:
+                if self._snapshot_id != snapshot_id:
+                    return  # Another process compacted meanwhile
+                for player_id in player_ids[i:i + COMPACTION_BATCH]:
+                    players[player_id] = json.dumps(self._players[player_id])
+
+        with self.journal.lock, self._lock:
+            self.refresh()
+            if self._snapshot_id != snapshot_id or self.journal.position()[0] != inode:
+                return
+            for record in self.journal.records(start, snapshot_id):
+                player_id = record_player_id(record)
+                if player_id in self._players:
+                    players[player_id] = json.dumps(self._players[player_id])
+            _, start = self.journal.position()
+
+        # The same text json.dumps(list(players)) gives
+        data = '[' + ', '.join(players.values()) + ']'
+        new_snapshot_id = self._snapshot_hash(data)
+        tmp_path = write_temp(self.players_file, data)
+        try:
+            with self.journal.lock, self._lock:
+                self.refresh()
+                if self._snapshot_id != snapshot_id or self.journal.position()[0] != inode:
+                    return
+                records = self.journal.records(start, snapshot_id)
+                # Until the journal is reset, the old one holds these records for
+                # both snapshots, should the process die in between
+                self.journal.append([base_record(new_snapshot_id)] + records)
+                os.replace(tmp_path, self.players_file)
+                self.journal.reset(new_snapshot_id, records)
+                self._snapshot_id = new_snapshot_id
+                # Our own write must not trigger a reload on the next request
+                self._set_snapshot_stamp(self._stamp(self.players_file))
+        finally:
+            remove_temp(tmp_path)